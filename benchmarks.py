@@ -0,0 +1,78 @@
+import random
+import timeit
+
+import homework
+
+SIZES = (1, 100, 10_000, 100_000)
+
+
+def make_payload(size, seed=0):
+    """Создаёт синтетический ответ API с заданным числом домашних работ."""
+    rng = random.Random(seed)
+    statuses = list(homework.HOMEWORK_STATUSES)
+    return {
+        'homeworks': [
+            {
+                'id': index,
+                'homework_name': f'user__hw{index}.zip',
+                'status': rng.choice(statuses),
+                'reviewer_comment': 'Всё нравится',
+                'date_updated': '2020-02-13T14:40:57Z',
+                'lesson_name': 'Итоговый проект',
+            }
+            for index in range(size)
+        ],
+        'current_date': 1_000_000_000,
+    }
+
+
+def legacy_validate(response):
+    """Проверка ответа прежними функциями check_response и parse_status."""
+    return list(map(homework.parse_status, homework.check_response(response)))
+
+
+def compiled_validate(response):
+    """Проверка ответа скомпилированным валидатором."""
+    return homework.VALIDATOR.validate(response)
+
+
+def measure(func, payload, repeat=5, number=None, aggregate=min):
+    """Возвращает время одного вызова функции в секундах.
+
+    Если number не задан, число вызовов в замере подбирается так,
+    чтобы замер длился не меньше 0.2 секунды. Из repeat замеров
+    берётся aggregate: по умолчанию лучший.
+    """
+    timer = timeit.Timer(lambda: func(payload))
+    if number is None:
+        number, _ = timer.autorange()
+    return aggregate(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def calibrate(**kwargs):
+    """Время эталонной нагрузки, к которому приводятся замеры.
+
+    Отношение к эталону мало зависит от скорости машины, поэтому
+    сохранённые базовые значения годятся на разных машинах.
+    Аргументы передаются в measure.
+    """
+    return measure(
+        lambda size: {index: str(index) for index in range(size)}, 10_000,
+        **kwargs
+    )
+
+
+def main():
+    """Печатает сравнение прежней и скомпилированной проверки."""
+    for size in SIZES:
+        payload = make_payload(size)
+        legacy = measure(legacy_validate, payload)
+        compiled = measure(compiled_validate, payload)
+        print(
+            f'{size:>7} домашек: прежняя {legacy * 1000:9.3f} мс, '
+            f'скомпилированная {compiled * 1000:9.3f} мс'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -8,3 +8,15 @@ class NegativeValueAPI(Exception):
 
 class EmptyList(Exception):
     """Класс исключений для статусов домашней работы."""
+
+
+class InvalidResponse(Exception):
+    """Класс исключений для ответа API, не прошедшего проверку."""
+
+    def __init__(self, reason):
+        super().__init__(f'ответ API не прошёл проверку: {reason}')
+        self.reason = reason
+
+
+class Throttled(NegativeValueAPI):
+    """Класс исключений для ответа 429 от эндпоинта."""
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import deque
+
+import metrics
+
+WINDOW = 60
+BACKOFF = 0.5
+RECOVERY = 0.05
+MIN_SCALE = 1 / 64
+
+
+class Governor:
+    """Общий бюджет запросов к API на все копии воркера.
+
+    Бюджет в запросах в секунду делится между копиями пропорционально
+    доле их разделов, внутри копии запросы выдаются по токенам.
+    Пользователи, чья работа на проверке, идут в очереди первыми,
+    остальные — по очереди в порядке наступления срока опроса. Чаще
+    fair_interval никого не опрашивают, поэтому при нехватке бюджета
+    каждый получает не больше равной доли.
+    На ответ 429 темп уменьшается вдвое и восстанавливается понемногу
+    с каждым успешным запросом.
+    """
+
+    def __init__(self, rate):
+        self.budget = rate
+        self.share = 1
+        self.scale = 1
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.granted = deque()
+        metrics.register('governor.usage', self.usage)
+        metrics.register('governor.rate', lambda: self.rate)
+
+    def set_share(self, share):
+        """Задаёт долю общего бюджета, доступную этой копии."""
+        self.share = share
+        self.update_rate()
+
+    def feedback(self, throttled):
+        """Учитывает ответ API: замедляется на 429, иначе ускоряется."""
+        if throttled:
+            self.scale = max(self.scale * BACKOFF, MIN_SCALE)
+            self.tokens = min(self.tokens, 0)
+            metrics.increment('governor.backoffs')
+        else:
+            self.scale = min(self.scale + RECOVERY, 1)
+        self.update_rate()
+
+    def update_rate(self):
+        """Пересчитывает темп запросов копии."""
+        self.rate = max(self.budget * self.share * self.scale, 1 / WINDOW)
+
+    def fair_interval(self, tenants):
+        """Наименьший интервал опроса при равной доле tenants пользователей."""
+        return tenants / self.rate
+
+    def priority(self, state):
+        """Ключ очерёдности: работы на проверке опрашиваются первыми."""
+        return not state.reviewing
+
+    def usage(self, now=None):
+        """Доля бюджета копии, израсходованная за последнее окно."""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            while self.granted and self.granted[0] <= now - WINDOW:
+                self.granted.popleft()
+            return len(self.granted) / (self.rate * WINDOW)
+
+    def acquire(self, wait):
+        """Дожидается разрешения на запрос.
+
+        wait(timeout) должна вернуть True, если ждать больше не нужно;
+        тогда возвращается False и запрос не делается.
+        """
+        while True:
+            now = time.monotonic()
+            self.tokens = min(
+                max(self.rate, 1),
+                self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                with self.lock:
+                    self.granted.append(now)
+                return True
+            delay = (1 - self.tokens) / self.rate
+            metrics.observe('governor.wait', delay)
+            if wait(delay):
+                return False
@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import metrics
+
+
+class Health:
+    """Сведения о свежести опроса для проверки живости воркера.
+
+    Воркер считается зависшим, если он давно не завершал ни цикла,
+    ни отдельного опроса, если все попытки опроса после последнего
+    успешного неудачны дольше max_poll_age, если на разбор просроченных
+    опросов в разрешённом темпе уйдёт дольше max_backlog_time секунд,
+    или если очередь уведомлений слишком длинная.
+    """
+
+    def __init__(self, backlog_time, outbox, max_progress_age,
+                 max_poll_age, max_backlog_time, max_outbox):
+        now = time.time()
+        self.backlog_time = backlog_time
+        self.outbox = outbox
+        self.max_progress_age = max_progress_age
+        self.max_poll_age = max_poll_age
+        self.max_backlog_time = max_backlog_time
+        self.max_outbox = max_outbox
+        self.last_progress = now
+        self.last_poll = now
+        self.last_attempt = now
+
+    def mark_cycle(self):
+        """Отмечает завершение цикла планировщика."""
+        self.last_progress = time.time()
+
+    def mark_attempt(self, success):
+        """Отмечает попытку опроса и её успех."""
+        self.last_attempt = self.last_progress = time.time()
+        if success:
+            self.last_poll = self.last_attempt
+
+    def report(self):
+        """Возвращает признак готовности и показатели."""
+        now = time.time()
+        report = {
+            'progress_age': now - self.last_progress,
+            'poll_age': now - self.last_poll,
+            'failing_for': self.last_attempt - self.last_poll,
+            'backlog_time': self.backlog_time(),
+            'outbox': self.outbox(),
+        }
+        healthy = (
+            report['progress_age'] <= self.max_progress_age
+            and report['failing_for'] <= self.max_poll_age
+            and report['backlog_time'] <= self.max_backlog_time
+            and report['outbox'] <= self.max_outbox
+        )
+        return healthy, report
+
+
+def make_handler(health):
+    """Создаёт обработчик запросов /health и /metrics."""
+
+    class HealthHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            """Отдаёт состояние воркера в формате JSON."""
+            if self.path == '/health':
+                healthy, body = health.report()
+                status = (HTTPStatus.OK if healthy
+                          else HTTPStatus.SERVICE_UNAVAILABLE)
+            elif self.path == '/metrics':
+                status, body = HTTPStatus.OK, metrics.snapshot()
+            else:
+                status, body = HTTPStatus.NOT_FOUND, {}
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            """Не засоряет лог запросами проверки живости."""
+
+    return HealthHandler
+
+
+def serve(health, port):
+    """Запускает HTTP-сервер проверки живости в фоновом потоке."""
+    server = ThreadingHTTPServer(('', port), make_handler(health))
+    thread = threading.Thread(
+        target=server.serve_forever, name='health', daemon=True
+    )
+    thread.start()
+    return server
@@ -1,6 +1,11 @@
+import hashlib
 import json
 import logging
 import os
+import re
+import signal
+import sqlite3
+import threading
 import time
 from http import HTTPStatus
 
@@ -10,6 +15,16 @@ from dotenv import load_dotenv
 from telegram.error import TelegramError
 
 import exceptions as ex
+import governor
+import health
+import leases
+import metrics
+import planner
+import sinks
+import storage
+import tenants
+from scheduler import Scheduler
+from validation import Validator
 
 load_dotenv()
 
@@ -19,8 +34,38 @@ TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 RETRY_TIME = 600
+REQUEST_TIMEOUT = 10
+GLOBAL_RPS = float(os.getenv('GLOBAL_RPS', '10'))
+SHUTDOWN_TIMEOUT = 10
+MIN_RETRY_TIME = 60
+MAX_RETRY_TIME = RETRY_TIME * 6
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*(\d+)')
+
+NOTIFY_SINKS = os.getenv('NOTIFY_SINKS', 'telegram')
+NOTIFY_FILE = os.getenv('NOTIFY_FILE', 'notifications.jsonl')
+NOTIFY_WEBHOOK_URL = os.getenv('NOTIFY_WEBHOOK_URL')
+SINK_TIMEOUT = 10
+
+TENANTS_FILE = os.getenv('TENANTS_FILE')
+REGISTRY_CHECK_TIME = 5
+
+HEALTH_PORT = os.getenv('HEALTH_PORT')
+# Прогресс отмечается после каждого опроса и не реже раза
+# в REGISTRY_CHECK_TIME при ожидании бюджета.
+HEALTH_MAX_PROGRESS_AGE = (REQUEST_TIMEOUT + REGISTRY_CHECK_TIME) * 3
+HEALTH_MAX_POLL_AGE = MAX_RETRY_TIME * 2
+# Бюджет запросов сам держит очередь просроченных опросов: воркер
+# нездоров, только если в разрешённом темпе её не разобрать за
+# наибольший интервал опроса.
+HEALTH_MAX_BACKLOG_TIME = MAX_RETRY_TIME
+HEALTH_MAX_OUTBOX = 100
+
+STATE_DB = os.getenv('STATE_DB', 'homework_bot.sqlite3')
+LEASE_PARTITIONS = 64
+LEASE_RENEW_TIME = REGISTRY_CHECK_TIME
+LEASE_TTL = LEASE_RENEW_TIME * 6
 
 logging.basicConfig(level=logging.INFO,
                     filename='main.log',
@@ -29,31 +74,56 @@ logging.basicConfig(level=logging.INFO,
 
 logger = logging.getLogger(__name__)
 
+SHUTDOWN = threading.Event()
+
 HOMEWORK_STATUSES = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+RESPONSE_SCHEMA = (
+    ('homeworks', 'homeworks', list),
+    ('current_date', 'current_date', int),
+)
+HOMEWORK_SCHEMA = (
+    ('homework_name', 'name', str),
+    ('status', 'status', HOMEWORK_STATUSES),
+)
+VALIDATOR = Validator(RESPONSE_SCHEMA, 'homeworks', HOMEWORK_SCHEMA)
+
 
 def send_message(bot, message):
     """Отправляет сообщение в Telegram чат."""
     try:
         bot.send_message(TELEGRAM_CHAT_ID, message)
         logger.info('Сообщение отправлено')
-    except TelegramError(message):
+        return True
+    except TelegramError:
         message = 'сообщение не отправлено'
         logger.error(message)
+        return False
 
 
-def get_api_answer(current_timestamp):
-    """Делает запрос к единственному эндпоинту API-сервиса."""
-    timestamp = current_timestamp or int(time.time())
-    params = {'from_date': timestamp}
+def api_headers(token):
+    """Формирует заголовки запроса с токеном пользователя."""
+    return {'Authorization': f'OAuth {token}'}
+
+
+def request_endpoint(headers, params):
+    """Делает запрос к эндпоинту API-сервиса."""
     try:
-        response = requests.get(ENDPOINT, headers=HEADERS, params=params)
+        return requests.get(
+            ENDPOINT, headers=headers, params=params, timeout=REQUEST_TIMEOUT
+        )
     except requests.exceptions.RequestException as e:
-        raise SystemExit(e)
+        raise ex.NegativeValueAPI(f'эндпоинт недоступен: {e}')
+
+
+def request_api_answer(headers, current_timestamp):
+    """Делает запрос к API-сервису с заданными заголовками."""
+    timestamp = current_timestamp or int(time.time())
+    response = request_endpoint(headers, {'from_date': timestamp})
 
     if response.status_code == HTTPStatus.OK:
         try:
@@ -66,6 +136,46 @@ def get_api_answer(current_timestamp):
         raise ex.NegativeValueAPI(message)
 
 
+def get_api_answer(current_timestamp):
+    """Делает запрос к единственному эндпоинту API-сервиса."""
+    return request_api_answer(HEADERS, current_timestamp)
+
+
+def fetch_tenant(state):
+    """Запрашивает ответ API, не разбирая неизменившиеся ответы.
+
+    Отпечаток тела ответа считается без поля current_date, которое
+    меняется при каждом запросе. Если отпечаток совпал с прошлым
+    или сервер ответил 304 на If-None-Match, возвращает None и
+    сдвигает только current_timestamp. Иначе возвращает отпечаток,
+    ETag и разобранный ответ; сохранять их в состоянии следует только
+    после проверки ответа.
+    """
+    headers = api_headers(state.tenant.practicum_token)
+    if state.etag:
+        headers['If-None-Match'] = state.etag
+    response = request_endpoint(
+        headers, {'from_date': state.current_timestamp}
+    )
+    if response.status_code == HTTPStatus.NOT_MODIFIED:
+        metrics.increment('poll.unchanged')
+        return None
+    if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+        metrics.increment('poll.throttled')
+        raise ex.Throttled('эндпоинт ограничил частоту запросов')
+    if response.status_code != HTTPStatus.OK:
+        raise ex.NegativeValueAPI('нет ответа от эндпоинта')
+
+    body = response.content
+    match = CURRENT_DATE.search(body)
+    fingerprint = hashlib.blake2b(CURRENT_DATE.sub(b'', body)).digest()
+    if match and fingerprint == state.fingerprint:
+        state.current_timestamp = int(match.group(1))
+        metrics.increment('poll.unchanged')
+        return None
+    return fingerprint, response.headers.get('ETag'), response.json()
+
+
 def check_response(response):
     """Проверяет ответ API на корректность."""
     if type(response) is not dict:
@@ -73,12 +183,12 @@ def check_response(response):
         logger.error(message)
         raise TypeError(message)
 
-    if len(response['homeworks']) == 0:
-        return []
+    if 'homeworks' not in response:
+        raise KeyError('В ответе API не содержится ключ homeworks.')
 
-    if type(response['homeworks']) is not list:
+    homework = response['homeworks']
+    if type(homework) is not list:
         raise ex.NegativeValueException('домашки приходят не в виде списка')
-    homework = response["homeworks"]
     return homework
 
 
@@ -98,12 +208,13 @@ def parse_status(homework):
     if homework['status'] not in HOMEWORK_STATUSES:
         raise KeyError('ошибка статуса')
 
-    homework_status = homework.get('status')
-    homework_name = homework.get('homework_name')
-    verdict = HOMEWORK_STATUSES[homework_status]
+    return format_status(homework['homework_name'], homework['status'])
 
-    message = f'Изменился статус проверки работы "{homework_name}". {verdict}'
-    return message
+
+def format_status(homework_name, homework_status):
+    """Формирует сообщение о новом статусе домашней работы."""
+    verdict = HOMEWORK_STATUSES[homework_status]
+    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
 
 
 def check_tokens():
@@ -120,35 +231,296 @@ def check_tokens():
     return True
 
 
+def poll_tenant(notify_sinks, state):
+    """Проверяет статус домашней работы одного пользователя.
+
+    Возвращает признак успешного опроса и домашнюю работу, статус
+    которой изменился, или None.
+    """
+    tenant = state.tenant
+    homework = None
+    success = False
+    state.throttled = False
+    try:
+        fetched = fetch_tenant(state)
+        if fetched is not None:
+            fingerprint, etag, response = fetched
+            result = VALIDATOR.validate(response)
+
+            if result.homeworks:
+                homework = result.homeworks[0]
+                state.reviewing = homework.status == 'reviewing'
+                message = format_status(homework.name, homework.status)
+                sinks.deliver(notify_sinks, tenant.chat_id, message)
+
+            state.current_timestamp = result.current_date
+            state.fingerprint = fingerprint
+            state.etag = etag
+        success = True
+
+    except Exception as e:
+        state.throttled = isinstance(e, ex.Throttled)
+        message = f'Сбой в работе программы: {e}'
+        logger.error(message)
+        if message != state.error:
+            state.error = message
+            sinks.deliver(
+                notify_sinks, tenant.chat_id, message,
+                error_delivered(state, message)
+            )
+    return success, homework
+
+
+def error_delivered(state, message):
+    """Обработчик итога доставки сообщения об ошибке.
+
+    Ошибка запоминается сразу, чтобы не дублировать её в следующих
+    опросах, и забывается, если её не доставил ни один канал.
+    """
+    def done(delivered):
+        if not delivered and state.error == message:
+            state.error = None
+    return done
+
+
+def reload_registry(registry, scheduler, now):
+    """Применяет к расписанию изменения реестра пользователей."""
+    try:
+        changes = registry.poll()
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f'Реестр пользователей не прочитан: {e}')
+        return
+    if changes:
+        scheduler.apply(changes, now)
+        added, removed, updated = changes
+        logger.info(
+            f'Реестр обновлён: +{len(added)} -{len(removed)} '
+            f'~{len(updated)}'
+        )
+
+
+def renew_leases(keeper, scheduler, quota, force=False):
+    """Продлевает аренды и пересчитывает долю бюджета копии.
+
+    Пользователи из только что полученных разделов помечаются
+    несверенными: их метку времени опрашивала другая копия, и перед
+    опросом она перечитывается из STATE_DB. Сбой хранилища только
+    записывается в лог: копия владеет разделами, пока не истекли
+    аренды, и продлит их в следующий раз.
+    """
+    try:
+        acquired = keeper.refresh(force)
+    except sqlite3.Error as e:
+        logger.error(f'Не удалось продлить аренды: {e}')
+        acquired = set()
+    if acquired:
+        for state in scheduler.states.values():
+            partition = leases.partition_for(
+                state.tenant.id, keeper.partitions
+            )
+            if partition in acquired:
+                state.synced = False
+    quota.set_share(keeper.share())
+
+
+def poll_owned(notify_sinks, conn, poll_planner, worker_health, state):
+    """Опрашивает пользователя своего раздела и сохраняет метку времени.
+
+    При сбое хранилища пользователь, чья метка времени не прочитана,
+    пропускается до следующего срока, а несохранённая метка остаётся
+    в памяти и сохраняется после следующего успешного опроса.
+    """
+    tenant_id = state.tenant.id
+    if not state.synced:
+        try:
+            state.current_timestamp = storage.load_checkpoint(
+                conn, tenant_id, state.current_timestamp
+            )
+        except sqlite3.Error as e:
+            logger.error(f'Не удалось прочитать метку {tenant_id}: {e}')
+            return
+        state.fingerprint = state.etag = None
+        state.synced = True
+    success, homework = poll_tenant(notify_sinks, state)
+    worker_health.mark_attempt(success)
+    if success:
+        try:
+            storage.save_checkpoint(conn, tenant_id, state.current_timestamp)
+        except sqlite3.Error as e:
+            logger.error(f'Не удалось сохранить метку {tenant_id}: {e}')
+    if homework:
+        at = time.time()
+        try:
+            planner.record_transition(conn, tenant_id, homework.status, at)
+        except sqlite3.Error as e:
+            logger.error(f'Не удалось сохранить смену статуса: {e}')
+        poll_planner.record(tenant_id, at)
+
+
+def budget_waiter(keeper, scheduler, quota, worker_health):
+    """Ожидание бюджета запросов, не похожее на зависание.
+
+    Ожидание режется на отрезки не длиннее REGISTRY_CHECK_TIME; перед
+    каждым отмечается прогресс и при необходимости продлеваются аренды.
+    """
+    def wait(timeout):
+        worker_health.mark_cycle()
+        renew_leases(keeper, scheduler, quota)
+        return SHUTDOWN.wait(min(timeout, REGISTRY_CHECK_TIME))
+    return wait
+
+
+def poll_due(notify_sinks, conn, scheduler, poll_planner, quota,
+             worker_health, keeper, now):
+    """Опрашивает пользователей, чей срок подошёл, и планирует следующий.
+
+    Аренды продлеваются перед каждым опросом, если пора, поэтому
+    даже долгий цикл при нехватке бюджета не переживает свою аренду.
+    Обход длится не дольше REGISTRY_CHECK_TIME: неопрошенные остаются
+    в очереди, и пользователи, чья работа попала на проверку за это
+    время, в следующем цикле идут первыми. Интервал опроса не меньше
+    равной доли бюджета копии на каждого из её пользователей.
+    """
+    wait = budget_waiter(keeper, scheduler, quota, worker_health)
+    deadline = time.monotonic() + REGISTRY_CHECK_TIME
+    owned = sum(1 for tenant_id in scheduler.states if keeper.owns(tenant_id))
+    for state in scheduler.pop_due(now, quota.priority):
+        if SHUTDOWN.is_set():
+            break
+        tenant_id = state.tenant.id
+        if keeper.owns(tenant_id):
+            if not quota.acquire(wait):
+                break
+            renew_leases(keeper, scheduler, quota)
+            if keeper.owns(tenant_id):
+                poll_owned(
+                    notify_sinks, conn, poll_planner, worker_health, state
+                )
+                quota.feedback(state.throttled)
+        polled_at = time.time()
+        interval = max(
+            poll_planner.next_interval(tenant_id, polled_at),
+            quota.fair_interval(owned)
+        )
+        scheduler.schedule(tenant_id, polled_at + interval)
+        if time.monotonic() >= deadline:
+            break
+
+
+def backlog_time(scheduler, keeper, quota):
+    """Сколько секунд займёт опрос просроченных пользователей копии.
+
+    Учитываются только пользователи своих разделов: остальных копия
+    не опрашивает и бюджет на них не тратит.
+    """
+    backlog = scheduler.backlog(
+        time.time(), lambda state: keeper.owns(state.tenant.id)
+    )
+    return backlog / quota.rate
+
+
+def make_sinks(bot):
+    """Создаёт каналы доставки, перечисленные в NOTIFY_SINKS."""
+    factories = {
+        'telegram': lambda: sinks.TelegramSink(bot, SINK_TIMEOUT),
+        'file': lambda: sinks.FileSink(NOTIFY_FILE, SINK_TIMEOUT),
+        'webhook': lambda: sinks.WebhookSink(NOTIFY_WEBHOOK_URL, SINK_TIMEOUT),
+        'stdout': lambda: sinks.StdoutSink(SINK_TIMEOUT),
+    }
+    names = [name.strip() for name in NOTIFY_SINKS.split(',') if name.strip()]
+    unknown = set(names) - factories.keys()
+    if unknown:
+        raise SystemExit(f'Неизвестные каналы уведомлений: {unknown}')
+    if 'webhook' in names and not NOTIFY_WEBHOOK_URL:
+        raise SystemExit('Не задана переменная окружения NOTIFY_WEBHOOK_URL.')
+    return [factories[name]() for name in names]
+
+
+def make_registry():
+    """Создаёт реестр из файла или из переменных окружения."""
+    if TENANTS_FILE:
+        return tenants.RegistryWatcher(TENANTS_FILE)
+    return tenants.StaticRegistry(
+        tenants.Tenant('default', PRACTICUM_TOKEN, TELEGRAM_CHAT_ID)
+    )
+
+
+def request_shutdown(signum, frame):
+    """Останавливает опрос по сигналу."""
+    logger.info(f'Получен сигнал {signum}, бот останавливается')
+    SHUTDOWN.set()
+
+
+def shutdown(conn, keeper, scheduler, notify_sinks):
+    """Дожидается уведомлений, сохраняет состояние и отпускает аренды.
+
+    Сохраняются только пользователи своих разделов, сверенные с базой:
+    метки остальных устарели и затёрли бы сохранённые их владельцами.
+    """
+    sinks.drain(notify_sinks, time.monotonic() + SHUTDOWN_TIMEOUT)
+    try:
+        storage.save_checkpoints(conn, [
+            state for state in scheduler.states.values()
+            if state.synced and keeper.owns(state.tenant.id)
+        ])
+    except sqlite3.Error as e:
+        logger.error(f'Не удалось сохранить метки при остановке: {e}')
+    try:
+        keeper.release()
+    except sqlite3.Error as e:
+        logger.error(f'Не удалось отпустить аренды: {e}')
+    logger.info('Бот остановлен')
+
+
 def main():
     """Основная логика работы бота."""
-    check_result = check_tokens()
+    check_result = bool(TELEGRAM_TOKEN) if TENANTS_FILE else check_tokens()
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
 
     if not check_result:
         message = 'Аутентификация не удалась'
         logger.critical(message)
         raise SystemExit(message)
-    error = ''
-    while True:
-        try:
-            response = get_api_answer(current_timestamp)
-            homework = check_response(response)
-
-            if homework:
-                message = parse_status(homework[0])
-                send_message(bot, message)
-
-            current_timestamp = response['current_date']
-            time.sleep(RETRY_TIME)
-
-        except Exception as e:
-            message = f'Сбой в работе программы: {e}'
-            logger.error(message)
-            if message != error and send_message(bot, message):
-                error = message
-            time.sleep(RETRY_TIME)
+    notify_sinks = make_sinks(bot)
+    conn = storage.connect(STATE_DB)
+    keeper = leases.LeaseKeeper(
+        conn, leases.replica_id(), LEASE_PARTITIONS, LEASE_TTL,
+        LEASE_RENEW_TIME
+    )
+    registry = make_registry()
+    scheduler = Scheduler(RETRY_TIME)
+    poll_planner = planner.PollPlanner(
+        RETRY_TIME, MIN_RETRY_TIME, MAX_RETRY_TIME
+    )
+    poll_planner.load(conn)
+    quota = governor.Governor(GLOBAL_RPS)
+    worker_health = health.Health(
+        lambda: backlog_time(scheduler, keeper, quota),
+        lambda: sinks.outbox_depth(notify_sinks),
+        HEALTH_MAX_PROGRESS_AGE, HEALTH_MAX_POLL_AGE,
+        HEALTH_MAX_BACKLOG_TIME, HEALTH_MAX_OUTBOX,
+    )
+    if HEALTH_PORT:
+        health.serve(worker_health, int(HEALTH_PORT))
+    handlers = {
+        signum: signal.signal(signum, request_shutdown)
+        for signum in (signal.SIGTERM, signal.SIGINT)
+    }
+    try:
+        while True:
+            now = time.time()
+            reload_registry(registry, scheduler, now)
+            renew_leases(keeper, scheduler, quota, force=True)
+            poll_due(notify_sinks, conn, scheduler, poll_planner, quota,
+                     worker_health, keeper, now)
+            worker_health.mark_cycle()
+            timeout = scheduler.sleep_time(time.time(), REGISTRY_CHECK_TIME)
+            if SHUTDOWN.wait(timeout):
+                break
+    finally:
+        shutdown(conn, keeper, scheduler, notify_sinks)
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
 
 
 if __name__ == '__main__':
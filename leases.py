@@ -0,0 +1,117 @@
+import math
+import os
+import socket
+import time
+import zlib
+
+
+def replica_id():
+    """Возвращает идентификатор текущей копии воркера."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def partition_for(key, partitions):
+    """Определяет раздел, к которому относится ключ."""
+    return zlib.crc32(str(key).encode()) % partitions
+
+
+def claim(conn, owner, partitions, ttl, now=None):
+    """Продлевает свои аренды и забирает свободные разделы.
+
+    Каждая копия держит не больше своей доли разделов: лишние
+    отпускаются, чтобы их подхватили остальные живые копии.
+    Возвращает множество разделов, которыми копия владеет.
+    """
+    now = time.time() if now is None else now
+    expires_at = now + ttl
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute(
+            'INSERT OR REPLACE INTO replicas (owner, expires_at) '
+            'VALUES (?, ?)', (owner, expires_at)
+        )
+        conn.execute('DELETE FROM replicas WHERE expires_at <= ?', (now,))
+        conn.execute('DELETE FROM leases WHERE expires_at <= ?', (now,))
+        live = conn.execute('SELECT COUNT(*) FROM replicas').fetchone()[0]
+        share = math.ceil(partitions / live)
+
+        owned = [row[0] for row in conn.execute(
+            'SELECT partition FROM leases WHERE owner = ? '
+            'ORDER BY partition', (owner,)
+        )]
+        excess, owned = owned[share:], owned[:share]
+        conn.executemany(
+            'DELETE FROM leases WHERE partition = ?',
+            [(partition,) for partition in excess]
+        )
+        taken = {row[0] for row in conn.execute(
+            'SELECT partition FROM leases'
+        )}
+        free = [p for p in range(partitions) if p not in taken]
+        owned.extend(free[:share - len(owned)])
+        conn.executemany(
+            'INSERT OR REPLACE INTO leases (partition, owner, expires_at) '
+            'VALUES (?, ?, ?)',
+            [(partition, owner, expires_at) for partition in owned]
+        )
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return set(owned)
+
+
+def release(conn, owner):
+    """Отпускает все аренды копии, чтобы их сразу забрали другие."""
+    conn.execute('DELETE FROM leases WHERE owner = ?', (owner,))
+    conn.execute('DELETE FROM replicas WHERE owner = ?', (owner,))
+
+
+class LeaseKeeper:
+    """Аренды копии, продлеваемые не реже раза в renew_time секунд.
+
+    Владение проверяется по результату последнего продления, поэтому
+    перед каждым опросом аренды продлеваются, если пора: ttl должен
+    в несколько раз превышать renew_time и время одного опроса.
+    """
+
+    def __init__(self, conn, owner, partitions, ttl, renew_time):
+        self.conn = conn
+        self.owner = owner
+        self.partitions = partitions
+        self.ttl = ttl
+        self.renew_time = renew_time
+        self.owned = set()
+        self.renewed_at = None
+
+    def refresh(self, force=False):
+        """Продлевает аренды, если пора; возвращает новые разделы."""
+        now = time.monotonic()
+        if (not force and self.renewed_at is not None
+                and now - self.renewed_at < self.renew_time):
+            return set()
+        owned = claim(self.conn, self.owner, self.partitions, self.ttl)
+        self.renewed_at = now
+        acquired = owned - self.owned
+        self.owned = owned
+        return acquired
+
+    def owns(self, key):
+        """Проверяет, что раздел ключа принадлежит копии.
+
+        Если аренды давно не удавалось продлить, они считаются
+        истёкшими и копия не владеет ничем.
+        """
+        if (self.renewed_at is None
+                or time.monotonic() - self.renewed_at >= self.ttl):
+            return False
+        return partition_for(key, self.partitions) in self.owned
+
+    def share(self):
+        """Доля разделов, которыми владеет копия."""
+        return len(self.owned) / self.partitions
+
+    def release(self):
+        """Отпускает все аренды копии."""
+        release(self.conn, self.owner)
+        self.owned = set()
@@ -0,0 +1,48 @@
+import threading
+from collections import Counter
+
+lock = threading.Lock()
+counters = Counter()
+gauges = {}
+timings = {}
+probes = {}
+
+
+def increment(name, amount=1):
+    """Увеличивает счётчик."""
+    with lock:
+        counters[name] += amount
+
+
+def observe(name, value):
+    """Учитывает длительность: число замеров, сумму и максимум."""
+    with lock:
+        count, total, peak = timings.get(name, (0, 0.0, 0.0))
+        timings[name] = (count + 1, total + value, max(peak, value))
+
+
+def gauge(name, value):
+    """Запоминает текущее значение показателя."""
+    with lock:
+        gauges[name] = value
+
+
+def register(name, probe):
+    """Регистрирует показатель, вычисляемый при каждом чтении метрик."""
+    with lock:
+        probes[name] = probe
+
+
+def snapshot():
+    """Возвращает текущие значения всех метрик."""
+    with lock:
+        result = dict(counters)
+        result.update(gauges)
+        for name, (count, total, peak) in timings.items():
+            result[f'{name}.count'] = count
+            result[f'{name}.avg'] = total / count
+            result[f'{name}.max'] = peak
+        current = dict(probes)
+    for name, probe in current.items():
+        result[name] = probe()
+    return result
@@ -0,0 +1,196 @@
+import math
+import os
+import sys
+import time
+from collections import Counter
+
+import storage
+
+HOUR = 3600
+WEEK_BINS = 7 * 24
+TENANT_WEIGHT = 10
+
+
+def week_bin(timestamp):
+    """Номер часа недели (UTC), в который попадает момент времени."""
+    moment = time.gmtime(timestamp)
+    return moment.tm_wday * 24 + moment.tm_hour
+
+
+def record_transition(conn, tenant_id, status, at):
+    """Сохраняет смену статуса домашней работы."""
+    conn.execute(
+        'INSERT INTO transitions (tenant_id, status, at) VALUES (?, ?, ?)',
+        (tenant_id, status, at)
+    )
+
+
+def load_transitions(conn):
+    """Возвращает все сохранённые смены статуса."""
+    return conn.execute(
+        'SELECT tenant_id, at FROM transitions ORDER BY at'
+    ).fetchall()
+
+
+def distribute(weights, budget_interval, min_interval, max_interval):
+    """Распределяет бюджет опросов по часам недели.
+
+    Ожидаемая задержка в часе i равна interval_i / 2, поэтому при
+    фиксированном числе опросов сумма p_i * interval_i минимальна,
+    когда число опросов в часе пропорционально sqrt(p_i). Часы, где
+    интервал выходит за min_interval или max_interval, закрепляются
+    на границе, а остаток бюджета заново делится между остальными,
+    пока закреплять нечего.
+    """
+    total = sum(weights)
+    roots = [math.sqrt(weight / total) for weight in weights]
+    low, high = HOUR / max_interval, HOUR / min_interval
+    polls = WEEK_BINS * HOUR / budget_interval
+    calls = [None] * WEEK_BINS
+    free = list(range(WEEK_BINS))
+    while free:
+        left = polls - sum(count for count in calls if count is not None)
+        scale = left / sum(roots[hour] for hour in free)
+        above = [hour for hour in free if roots[hour] * scale > high]
+        below = [hour for hour in free if roots[hour] * scale < low]
+        excess = sum(roots[hour] * scale - high for hour in above)
+        deficit = sum(low - roots[hour] * scale for hour in below)
+        if not above and not below:
+            for hour in free:
+                calls[hour] = roots[hour] * scale
+            break
+        # Закрепляется сторона с большим нарушением: так остаток
+        # меняется в одну сторону и закреплённые часы не выходят
+        # обратно за границу.
+        pinned, bound = (above, high) if excess >= deficit else (below, low)
+        for hour in pinned:
+            calls[hour] = bound
+        free = [hour for hour in free if calls[hour] is None]
+    return [HOUR / count for count in calls]
+
+
+class PollPlanner:
+    """Подбирает интервал опроса по истории смен статуса.
+
+    Глобальная гистограмма по часам недели сглаживается единицей,
+    гистограмма пользователя — глобальным распределением с весом
+    TENANT_WEIGHT, поэтому пользователи без истории опрашиваются
+    по глобальному расписанию.
+    """
+
+    def __init__(self, budget_interval, min_interval, max_interval):
+        self.budget_interval = budget_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.total = Counter()
+        self.tenants = {}
+        self.global_intervals = None
+
+    def load(self, conn):
+        """Строит гистограммы по сохранённой истории."""
+        for tenant_id, at in load_transitions(conn):
+            self.record(tenant_id, at)
+
+    def record(self, tenant_id, at):
+        """Учитывает смену статуса в гистограммах."""
+        hour = week_bin(at)
+        self.total[hour] += 1
+        self.tenants.setdefault(tenant_id, Counter())[hour] += 1
+        self.global_intervals = None
+
+    def global_weights(self):
+        """Сглаженное глобальное распределение смен статуса."""
+        return [self.total[hour] + 1 for hour in range(WEEK_BINS)]
+
+    def intervals(self, tenant_id):
+        """Интервалы опроса пользователя по часам недели."""
+        counts = self.tenants.get(tenant_id)
+        if counts is None:
+            if self.global_intervals is None:
+                self.global_intervals = self.distribute(self.global_weights())
+            return self.global_intervals
+        weights = self.global_weights()
+        norm = TENANT_WEIGHT / sum(weights)
+        return self.distribute([
+            counts[hour] + weight * norm
+            for hour, weight in enumerate(weights)
+        ])
+
+    def distribute(self, weights):
+        """Распределяет бюджет опросов планировщика по весам."""
+        return distribute(
+            weights, self.budget_interval,
+            self.min_interval, self.max_interval
+        )
+
+    def next_interval(self, tenant_id, now):
+        """Через сколько секунд опросить пользователя снова."""
+        return self.intervals(tenant_id)[week_bin(now)]
+
+
+def cost(intervals, observed):
+    """Ожидаемая задержка уведомления и число запросов в неделю."""
+    total = sum(observed)
+    delay = sum(
+        count * interval / 2 for count, interval in zip(observed, intervals)
+    ) / total
+    calls = sum(HOUR / interval for interval in intervals)
+    return delay, calls
+
+
+def evaluate(transitions, budget_interval, min_interval, max_interval,
+             holdout=0.3):
+    """Сравнивает постоянный и предсказательный опрос на истории.
+
+    Гистограммы строятся по ранним сменам статуса, а задержка
+    оценивается на последней доле holdout, чтобы не подглядывать
+    в данные, по которым строился план. Глобальный план оценивается
+    по всем сменам статуса, планы пользователей — каждый по сменам
+    своего пользователя, как их и применяет next_interval.
+    """
+    split = int(len(transitions) * (1 - holdout))
+    planner = PollPlanner(budget_interval, min_interval, max_interval)
+    for tenant_id, at in transitions[:split]:
+        planner.record(tenant_id, at)
+    observed = Counter(week_bin(at) for _, at in transitions[split:])
+    observed = [observed[hour] for hour in range(WEEK_BINS)]
+    by_tenant = {}
+    for tenant_id, at in transitions[split:]:
+        by_tenant.setdefault(tenant_id, Counter())[week_bin(at)] += 1
+    delay = calls = 0
+    for tenant_id, counts in by_tenant.items():
+        tenant_observed = [counts[hour] for hour in range(WEEK_BINS)]
+        tenant_delay, tenant_calls = cost(
+            planner.intervals(tenant_id), tenant_observed
+        )
+        delay += tenant_delay * sum(tenant_observed)
+        calls += tenant_calls
+    return {
+        'constant': cost([budget_interval] * WEEK_BINS, observed),
+        'predictive': cost(planner.distribute(planner.global_weights()),
+                           observed),
+        'per_tenant': (
+            delay / sum(observed), calls / len(by_tenant)
+        ),
+    }
+
+
+def main():
+    """Печатает оценку расписания по истории из STATE_DB."""
+    budget_interval = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    conn = storage.connect(os.getenv('STATE_DB', 'homework_bot.sqlite3'))
+    transitions = load_transitions(conn)
+    if len(transitions) < 2:
+        print('Недостаточно истории смен статуса для оценки.')
+        return
+    report = evaluate(
+        transitions, budget_interval, budget_interval / 10,
+        budget_interval * 6
+    )
+    for name, (delay, calls) in report.items():
+        print(f'{name}: задержка {delay / 60:.1f} мин, '
+              f'{calls:.0f} запросов в неделю')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+import heapq
+import itertools
+from collections import deque
+import zlib
+
+
+class TenantState:
+    """Состояние опроса одного пользователя."""
+
+    def __init__(self, tenant, current_timestamp):
+        self.tenant = tenant
+        self.current_timestamp = current_timestamp
+        self.error = ''
+        self.synced = False
+        self.reviewing = False
+        self.throttled = False
+        self.etag = None
+        self.fingerprint = None
+        self.generation = 0
+
+
+class Scheduler:
+    """Очередь опросов пользователей по времени.
+
+    Отменённые и перенесённые записи не удаляются из кучи, а
+    пропускаются при извлечении по несовпадению поколения. Поколения
+    берутся из общего счётчика, поэтому записи удалённого и снова
+    добавленного пользователя не совпадают с новыми.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.states = {}
+        self.queue = []
+        self.popped = deque()
+        self.generations = itertools.count(1)
+
+    def schedule(self, tenant_id, due):
+        """Назначает следующий опрос пользователя."""
+        state = self.states[tenant_id]
+        state.generation = next(self.generations)
+        heapq.heappush(self.queue, (due, tenant_id, state.generation))
+
+    def add(self, tenant, now):
+        """Добавляет пользователя, разнося первые опросы по интервалу."""
+        self.states[tenant.id] = TenantState(tenant, int(now))
+        offset = zlib.crc32(tenant.id.encode()) % self.interval
+        self.schedule(tenant.id, now + offset)
+
+    def update(self, tenant):
+        """Обновляет данные пользователя, сохраняя его состояние."""
+        self.states[tenant.id].tenant = tenant
+
+    def cancel(self, tenant_id):
+        """Снимает пользователя с опроса."""
+        self.states.pop(tenant_id, None)
+
+    def apply(self, changes, now):
+        """Применяет изменения реестра пользователей."""
+        added, removed, updated = changes
+        for tenant in removed:
+            self.cancel(tenant.id)
+        for tenant in updated:
+            self.update(tenant)
+        for tenant in added:
+            self.add(tenant, now)
+
+    def is_current(self, entry):
+        """Проверяет, что запись очереди не устарела."""
+        _, tenant_id, generation = entry
+        state = self.states.get(tenant_id)
+        return state is not None and state.generation == generation
+
+    def pop_due(self, now, priority=None):
+        """Извлекает пользователей, которых пора опросить.
+
+        Без priority пользователи идут в порядке срока опроса, с ним —
+        в порядке ключа priority, а при равенстве по сроку. Извлечённые,
+        но ещё не отданные пользователи учитываются в backlog, а если
+        обход прерван, возвращаются в очередь со своим сроком.
+        """
+        due = []
+        while self.queue and self.queue[0][0] <= now:
+            entry = heapq.heappop(self.queue)
+            if self.is_current(entry):
+                due.append(entry)
+        if priority is not None:
+            due.sort(key=lambda entry: priority(self.states[entry[1]]))
+        self.popped = deque(due)
+        try:
+            while self.popped:
+                yield self.states[self.popped.popleft()[1]]
+        finally:
+            for entry in self.popped:
+                heapq.heappush(self.queue, entry)
+            self.popped = deque()
+
+    def next_due(self):
+        """Возвращает время ближайшего опроса или None."""
+        while self.queue and not self.is_current(self.queue[0]):
+            heapq.heappop(self.queue)
+        return self.queue[0][0] if self.queue else None
+
+    def backlog(self, now, counted=None):
+        """Число пользователей, чей опрос уже просрочен.
+
+        counted(state) отбирает учитываемых пользователей, без него
+        учитываются все.
+        """
+        states = [
+            self.states[entry[1]] for entry in list(self.popped)
+            if self.is_current(entry)
+        ] + [
+            self.states[entry[1]] for entry in list(self.queue)
+            if entry[0] <= now and self.is_current(entry)
+        ]
+        if counted is None:
+            return len(states)
+        return sum(1 for state in states if counted(state))
+
+    def sleep_time(self, now, limit):
+        """Сколько можно спать до ближайшего опроса, но не дольше limit."""
+        due = self.next_due()
+        if due is None:
+            return limit
+        return min(max(due - now, 0), limit)
@@ -0,0 +1,171 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import metrics
+
+SINK_WORKERS = 4
+
+logger = logging.getLogger(__name__)
+
+
+class Sink:
+    """Канал доставки уведомлений.
+
+    У каждого канала свой пул потоков, поэтому зависший канал копит
+    очередь только у себя и не задерживает остальные.
+    """
+
+    name = 'sink'
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(
+            max_workers=SINK_WORKERS, thread_name_prefix=self.name
+        )
+        self.lock = threading.Lock()
+        self.pending = 0
+
+    def send(self, chat_id, message):
+        """Доставляет сообщение пользователю."""
+        raise NotImplementedError
+
+    def timed_send(self, chat_id, message):
+        """Доставляет сообщение и учитывает время доставки."""
+        start = time.monotonic()
+        try:
+            self.send(chat_id, message)
+        except Exception:
+            metrics.increment(f'sink.{self.name}.errors')
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            metrics.observe(f'sink.{self.name}.latency', elapsed)
+            if elapsed > self.timeout:
+                metrics.increment(f'sink.{self.name}.timeouts')
+            with self.lock:
+                self.pending -= 1
+
+    def submit(self, chat_id, message):
+        """Ставит доставку в очередь канала."""
+        with self.lock:
+            self.pending += 1
+        return self.executor.submit(self.timed_send, chat_id, message)
+
+
+class TelegramSink(Sink):
+    """Отправка в Telegram чат пользователя."""
+
+    name = 'telegram'
+
+    def __init__(self, bot, timeout):
+        super().__init__(timeout)
+        self.bot = bot
+
+    def send(self, chat_id, message):
+        """Отправляет сообщение ботом Telegram."""
+        self.bot.send_message(chat_id, message, timeout=self.timeout)
+
+
+class FileSink(Sink):
+    """Запись уведомлений в локальный JSONL-файл."""
+
+    name = 'file'
+
+    def __init__(self, path, timeout):
+        super().__init__(timeout)
+        self.path = path
+        self.file_lock = threading.Lock()
+
+    def send(self, chat_id, message):
+        """Дописывает уведомление строкой JSON."""
+        line = json.dumps(
+            {'at': time.time(), 'chat_id': chat_id, 'message': message},
+            ensure_ascii=False
+        )
+        with self.file_lock, open(self.path, 'a', encoding='utf-8') as file:
+            file.write(line + '\n')
+
+
+class WebhookSink(Sink):
+    """Отправка уведомлений POST-запросом на внешний адрес."""
+
+    name = 'webhook'
+
+    def __init__(self, url, timeout):
+        super().__init__(timeout)
+        self.url = url
+
+    def send(self, chat_id, message):
+        """Отправляет уведомление в формате JSON."""
+        response = requests.post(
+            self.url, json={'chat_id': chat_id, 'message': message},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+
+class StdoutSink(Sink):
+    """Вывод уведомлений в стандартный поток."""
+
+    name = 'stdout'
+
+    def send(self, chat_id, message):
+        """Печатает уведомление."""
+        print(f'{chat_id}: {message}', flush=True)
+
+
+def deliver(sinks, chat_id, message, callback=None):
+    """Ставит сообщение в очередь всех каналов и сразу возвращается.
+
+    Когда все каналы завершат доставку, callback получает True, если
+    хотя бы один из них доставил сообщение. Таймауты каждый канал
+    соблюдает сам и учитывает в метриках.
+    """
+    lock = threading.Lock()
+    remaining = len(sinks)
+    delivered = False
+
+    def done(sink, future):
+        nonlocal remaining, delivered
+        if future.cancelled():
+            logger.error(f'{sink.name}: доставка отменена')
+        elif future.exception() is not None:
+            logger.error(
+                f'{sink.name}: сообщение не отправлено: {future.exception()}'
+            )
+        with lock:
+            delivered = delivered or (
+                not future.cancelled() and future.exception() is None
+            )
+            remaining -= 1
+            if remaining:
+                return
+        if delivered:
+            logger.info('Сообщение отправлено')
+        if callback is not None:
+            callback(delivered)
+
+    if not sinks and callback is not None:
+        callback(False)
+    for sink in sinks:
+        sink.submit(chat_id, message).add_done_callback(
+            lambda future, sink=sink: done(sink, future)
+        )
+
+
+def outbox_depth(sinks):
+    """Число доставок, ещё не завершённых во всех каналах."""
+    return sum(sink.pending for sink in sinks)
+
+
+def drain(sinks, deadline):
+    """Ждёт завершения доставок до срока и останавливает каналы."""
+    while outbox_depth(sinks) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    for sink in sinks:
+        sink.executor.shutdown(wait=False, cancel_futures=True)
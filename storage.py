@@ -0,0 +1,58 @@
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS replicas (
+    owner TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    partition INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transitions (
+    tenant_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    tenant_id TEXT PRIMARY KEY,
+    from_date INTEGER NOT NULL
+);
+"""
+
+
+def connect(path):
+    """Открывает общее хранилище состояния и создаёт таблицы."""
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def save_checkpoints(conn, states):
+    """Сохраняет метки времени опроса пользователей."""
+    conn.execute('BEGIN')
+    conn.executemany(
+        'INSERT OR REPLACE INTO checkpoints (tenant_id, from_date) '
+        'VALUES (?, ?)',
+        [(state.tenant.id, state.current_timestamp) for state in states]
+    )
+    conn.execute('COMMIT')
+
+
+def save_checkpoint(conn, tenant_id, current_timestamp):
+    """Сохраняет метку времени опроса одного пользователя."""
+    conn.execute(
+        'INSERT OR REPLACE INTO checkpoints (tenant_id, from_date) '
+        'VALUES (?, ?)', (tenant_id, current_timestamp)
+    )
+
+
+def load_checkpoint(conn, tenant_id, default):
+    """Возвращает сохранённую метку времени опроса пользователя."""
+    row = conn.execute(
+        'SELECT from_date FROM checkpoints WHERE tenant_id = ?',
+        (tenant_id,)
+    ).fetchone()
+    return default if row is None else row[0]
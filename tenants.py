@@ -0,0 +1,73 @@
+import json
+import os
+from collections import namedtuple
+
+Tenant = namedtuple('Tenant', ['id', 'practicum_token', 'chat_id'])
+FIELDS = frozenset(Tenant._fields)
+
+
+def load(path):
+    """Читает реестр пользователей из JSON-файла.
+
+    Файл неверной структуры вызывает ValueError, чтобы неудачная
+    правка реестра не останавливала воркер.
+    """
+    with open(path, encoding='utf-8') as file:
+        items = json.load(file)
+    if type(items) is not list:
+        raise ValueError('реестр должен быть списком пользователей')
+    registry = {}
+    for item in items:
+        if type(item) is not dict or not FIELDS <= item.keys():
+            raise ValueError(f'неверная запись реестра: {item!r}')
+        tenant_id = str(item['id'])
+        registry[tenant_id] = Tenant(
+            tenant_id, item['practicum_token'], item['chat_id']
+        )
+    return registry
+
+
+def diff(old, new):
+    """Возвращает добавленных, удалённых и изменённых пользователей."""
+    added = [new[key] for key in new.keys() - old.keys()]
+    removed = [old[key] for key in old.keys() - new.keys()]
+    updated = [
+        new[key] for key in new.keys() & old.keys() if new[key] != old[key]
+    ]
+    return added, removed, updated
+
+
+class RegistryWatcher:
+    """Следит за файлом реестра и отдаёт только изменения."""
+
+    def __init__(self, path):
+        self.path = path
+        self.signature = None
+        self.tenants = {}
+
+    def poll(self):
+        """Возвращает изменения реестра или None, если файл не менялся."""
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self.signature:
+            return None
+        tenants = load(self.path)
+        self.signature = signature
+        changes = diff(self.tenants, tenants)
+        self.tenants = tenants
+        return changes
+
+
+class StaticRegistry:
+    """Реестр из одного пользователя, заданного переменными окружения."""
+
+    def __init__(self, tenant):
+        self.tenants = {tenant.id: tenant}
+        self.loaded = False
+
+    def poll(self):
+        """Отдаёт пользователя один раз при первом опросе."""
+        if self.loaded:
+            return None
+        self.loaded = True
+        return diff({}, self.tenants)
@@ -0,0 +1,135 @@
+import json
+import os
+import statistics
+
+import pytest
+import requests
+import telegram
+import utils
+
+BASELINES_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'benchmark_baselines.json'
+)
+TOLERANCE = float(os.getenv('BENCHMARK_TOLERANCE', '0.5'))
+# Допуски для замеров, которые сильнее зависят от планировщика ОС:
+# main_cycle запускает потоки каналов и открывает базу.
+TOLERANCES = {'main_cycle': 1.0}
+UPDATE = bool(os.getenv('BENCHMARK_UPDATE'))
+REPEAT = 9
+# Проверки размера 1 и check_response, не зависящая от размера,
+# занимают доли микросекунды: их разброс больше любого допуска.
+SIZES = (100, 10_000, 100_000)
+TENANTS = (1, 100)
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.fixture(scope='module')
+def calibration():
+    import benchmarks
+
+    return benchmarks.calibrate(repeat=REPEAT, aggregate=statistics.median)
+
+
+@pytest.fixture(scope='module')
+def baselines():
+    try:
+        with open(BASELINES_FILE, encoding='utf-8') as file:
+            data = {} if UPDATE else json.load(file)
+    except FileNotFoundError:
+        data = {}
+    yield data
+    if UPDATE:
+        with open(BASELINES_FILE, 'w', encoding='utf-8') as file:
+            json.dump(data, file, indent=2, sort_keys=True)
+            file.write('\n')
+
+
+def measure(func, payload):
+    import benchmarks
+
+    return benchmarks.measure(
+        func, payload, repeat=REPEAT, aggregate=statistics.median
+    )
+
+
+def check_regression(name, elapsed, calibration, baselines):
+    ratio = elapsed / calibration
+    if UPDATE or name not in baselines:
+        baselines[name] = ratio
+        if not UPDATE:
+            pytest.skip(
+                f'Нет базового значения для `{name}`, '
+                'запустите с BENCHMARK_UPDATE=1'
+            )
+        return
+    tolerance = TOLERANCES.get(name.split('[')[0], TOLERANCE)
+    limit = baselines[name] * (1 + tolerance)
+    assert ratio <= limit, (
+        f'`{name}` замедлилась: {ratio:.4f} эталонов '
+        f'при базовом значении {baselines[name]:.4f} '
+        f'и допуске {tolerance:.0%}'
+    )
+
+
+class TestBenchmarks:
+
+    @pytest.mark.parametrize('size', SIZES)
+    def test_parse_status(self, size, calibration, baselines):
+        import benchmarks
+        import homework
+
+        homeworks = benchmarks.make_payload(size)['homeworks']
+        elapsed = measure(
+            lambda items: list(map(homework.parse_status, items)), homeworks
+        )
+        check_regression(
+            f'parse_status[{size}]', elapsed, calibration, baselines
+        )
+
+    @pytest.mark.parametrize('size', SIZES)
+    def test_validator(self, size, calibration, baselines):
+        import benchmarks
+
+        payload = benchmarks.make_payload(size)
+        elapsed = measure(benchmarks.compiled_validate, payload)
+        check_regression(f'validator[{size}]', elapsed, calibration, baselines)
+
+    @pytest.mark.parametrize('size', SIZES)
+    def test_get_api_answer(self, monkeypatch, size, calibration, baselines):
+        import benchmarks
+        import homework
+
+        response = utils.StubResponse(benchmarks.make_payload(size))
+        monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: response)
+        elapsed = measure(homework.get_api_answer, 1_000_000_000)
+        check_regression(
+            f'get_api_answer[{size}]', elapsed, calibration, baselines
+        )
+
+    @pytest.mark.parametrize('tenants', TENANTS)
+    def test_main_cycle(self, monkeypatch, tmp_path, tenants, calibration,
+                        baselines):
+        import benchmarks
+        import homework
+
+        registry = tmp_path / 'tenants.json'
+        registry.write_text(json.dumps([
+            {'id': index, 'practicum_token': 'token', 'chat_id': index}
+            for index in range(tenants)
+        ]))
+        response = utils.StubResponse(benchmarks.make_payload(1))
+
+        monkeypatch.setattr(requests, 'get', lambda *args, **kwargs: response)
+        monkeypatch.setattr(telegram, 'Bot', utils.StubBot)
+        monkeypatch.setattr(homework, 'SHUTDOWN', utils.StubShutdown())
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework, 'TENANTS_FILE', str(registry))
+        monkeypatch.setattr(homework, 'STATE_DB', ':memory:')
+        monkeypatch.setattr(homework, 'RETRY_TIME', 1)
+        monkeypatch.setattr(homework, 'GLOBAL_RPS', 1_000_000)
+
+        elapsed = measure(lambda _: homework.main(), None)
+        check_regression(
+            f'main_cycle[{tenants}]', elapsed, calibration, baselines
+        )
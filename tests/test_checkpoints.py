@@ -0,0 +1,232 @@
+import json
+import signal
+import sqlite3
+
+import requests
+import telegram
+import utils
+
+import governor
+import health
+import homework
+import leases
+import storage
+from scheduler import Scheduler
+from tenants import Tenant
+
+
+class Replica:
+
+    def __init__(self, conn, owner):
+        self.keeper = leases.LeaseKeeper(
+            conn, owner, homework.LEASE_PARTITIONS, homework.LEASE_TTL,
+            homework.LEASE_RENEW_TIME
+        )
+        self.scheduler = Scheduler(homework.RETRY_TIME)
+        self.scheduler.add(Tenant('t1', 'token', 1), now=100)
+        self.quota = governor.Governor(1_000_000)
+
+
+class LockedStore:
+
+    def __init__(self, conn, *statements):
+        self.conn = conn
+        self.statements = statements
+        self.failures = 0
+
+    def check(self, sql):
+        if sql.startswith(self.statements):
+            self.failures += 1
+            raise sqlite3.OperationalError('database is locked')
+
+    def execute(self, sql, *args):
+        self.check(sql)
+        return self.conn.execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        self.check(sql)
+        return self.conn.executemany(sql, *args)
+
+
+class StubHealth(health.Health):
+
+    def __init__(self):
+        super().__init__(lambda: 0, lambda: 0, 1, 1, 1, 1)
+
+
+class TestCheckpoints:
+
+    def test_successful_poll_saves_checkpoint(self, monkeypatch):
+        conn = storage.connect(':memory:')
+        replica = Replica(conn, 'a')
+        state = replica.scheduler.states['t1']
+
+        def fake_poll(notify_sinks, state):
+            state.current_timestamp = 500
+            return True, None
+
+        monkeypatch.setattr(homework, 'poll_tenant', fake_poll)
+        homework.poll_owned([], conn, None, StubHealth(), state)
+        assert storage.load_checkpoint(conn, 't1', None) == 500, (
+            'Убедитесь, что метка времени сохраняется после каждого '
+            'успешного опроса'
+        )
+
+    def test_acquired_partition_reloads_checkpoint(self, monkeypatch):
+        conn = storage.connect(':memory:')
+        replica = Replica(conn, 'b')
+        storage.save_checkpoint(conn, 't1', 900)
+        seen = []
+
+        def fake_poll(notify_sinks, state):
+            seen.append(state.current_timestamp)
+            return True, None
+
+        monkeypatch.setattr(homework, 'poll_tenant', fake_poll)
+        state = replica.scheduler.states['t1']
+        state.synced = True
+        homework.renew_leases(replica.keeper, replica.scheduler,
+                              replica.quota, force=True)
+        assert not state.synced, (
+            'Убедитесь, что пользователи из полученного раздела '
+            'помечаются несверенными'
+        )
+        homework.poll_owned([], conn, None, StubHealth(), state)
+        assert seen == [900], (
+            'Убедитесь, что после получения раздела опрос продолжается '
+            'с метки времени прежнего владельца'
+        )
+
+    def test_shutdown_saves_only_owned_synced_tenants(self):
+        conn = storage.connect(':memory:')
+        replica = Replica(conn, 'a')
+        replica.scheduler.add(Tenant('t2', 'token', 2), now=100)
+        replica.keeper.refresh(force=True)
+        storage.save_checkpoints(conn, [
+            replica.scheduler.states['t1'], replica.scheduler.states['t2']
+        ])
+        synced, unsynced = (
+            replica.scheduler.states['t1'], replica.scheduler.states['t2']
+        )
+        synced.synced, synced.current_timestamp = True, 1000
+        unsynced.current_timestamp = 50
+
+        homework.shutdown(conn, replica.keeper, replica.scheduler, [])
+        assert storage.load_checkpoint(conn, 't1', None) == 1000, (
+            'Убедитесь, что при остановке сохраняются свои пользователи'
+        )
+        assert storage.load_checkpoint(conn, 't2', None) == 100, (
+            'Убедитесь, что метки несверенных пользователей не сохраняются'
+        )
+
+    def test_shutdown_skips_foreign_tenants(self):
+        conn = storage.connect(':memory:')
+        leases.claim(conn, 'b', homework.LEASE_PARTITIONS, homework.LEASE_TTL)
+        storage.save_checkpoint(conn, 't1', 900)
+        replica = Replica(conn, 'a')
+        homework.renew_leases(replica.keeper, replica.scheduler,
+                              replica.quota, force=True)
+        state = replica.scheduler.states['t1']
+        state.synced, state.current_timestamp = True, 100
+
+        homework.shutdown(conn, replica.keeper, replica.scheduler, [])
+        assert storage.load_checkpoint(conn, 't1', None) == 900, (
+            'Убедитесь, что копия не затирает метки чужих пользователей'
+        )
+
+    def test_sigterm_saves_checkpoints_and_releases_leases(
+            self, monkeypatch, tmp_path):
+        registry = tmp_path / 'tenants.json'
+        registry.write_text(json.dumps(
+            [{'id': 't1', 'practicum_token': 'token', 'chat_id': 1}]
+        ))
+        db = str(tmp_path / 'state.sqlite3')
+        response = utils.StubResponse(
+            {'homeworks': [], 'current_date': 1000}
+        )
+        handler = signal.getsignal(signal.SIGTERM)
+
+        monkeypatch.setattr(requests, 'get', utils.StubApi(response))
+        monkeypatch.setattr(telegram, 'Bot', utils.StubBot)
+        monkeypatch.setattr(
+            homework, 'SHUTDOWN', utils.StubShutdown(signal.SIGTERM)
+        )
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework, 'TENANTS_FILE', str(registry))
+        monkeypatch.setattr(homework, 'STATE_DB', db)
+        monkeypatch.setattr(homework, 'RETRY_TIME', 1)
+        monkeypatch.setattr(homework, 'GLOBAL_RPS', 1_000_000)
+        homework.main()
+
+        conn = storage.connect(db)
+        assert storage.load_checkpoint(conn, 't1', None) == 1000, (
+            'Убедитесь, что после SIGTERM метка времени сохранена'
+        )
+        assert not conn.execute('SELECT * FROM leases').fetchall(), (
+            'Убедитесь, что после SIGTERM аренды отпущены'
+        )
+        assert signal.getsignal(signal.SIGTERM) is handler, (
+            'Убедитесь, что обработчик сигнала восстанавливается'
+        )
+
+    def test_failed_lease_renewal_keeps_leases_until_expiry(self):
+        conn = storage.connect(':memory:')
+        replica = Replica(conn, 'a')
+        homework.renew_leases(replica.keeper, replica.scheduler,
+                              replica.quota, force=True)
+        replica.keeper.conn = LockedStore(conn, 'BEGIN')
+
+        homework.renew_leases(replica.keeper, replica.scheduler,
+                              replica.quota, force=True)
+        assert replica.keeper.conn.failures == 1
+        assert replica.keeper.owns('t1'), (
+            'Убедитесь, что сбой продления не отнимает неистёкшие аренды'
+        )
+        replica.keeper.renewed_at -= homework.LEASE_TTL
+        assert not replica.keeper.owns('t1'), (
+            'Убедитесь, что непродлённые аренды истекают'
+        )
+
+    def test_failing_store_does_not_stop_the_loop(
+            self, monkeypatch, tmp_path):
+        registry = tmp_path / 'tenants.json'
+        registry.write_text(json.dumps([
+            {'id': tenant_id, 'practicum_token': 'token', 'chat_id': 1}
+            for tenant_id in ('t1', 't2')
+        ]))
+        response = utils.StubResponse({
+            'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+            'current_date': 1000,
+        })
+        api = utils.StubApi(response)
+        stores = []
+        connect = storage.connect
+
+        def locked_connect(path):
+            stores.append(LockedStore(
+                connect(path), 'INSERT OR REPLACE INTO checkpoints',
+                'INSERT INTO transitions'
+            ))
+            return stores[-1]
+
+        monkeypatch.setattr(storage, 'connect', locked_connect)
+        monkeypatch.setattr(requests, 'get', api)
+        monkeypatch.setattr(telegram, 'Bot', utils.StubBot)
+        monkeypatch.setattr(
+            homework, 'SHUTDOWN', utils.StubShutdown(signal.SIGTERM)
+        )
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework, 'TENANTS_FILE', str(registry))
+        monkeypatch.setattr(homework, 'STATE_DB', ':memory:')
+        monkeypatch.setattr(homework, 'NOTIFY_SINKS', '')
+        monkeypatch.setattr(homework, 'RETRY_TIME', 1)
+        monkeypatch.setattr(homework, 'GLOBAL_RPS', 1_000_000)
+        homework.main()
+
+        assert len(api.requests) == 2, (
+            'Убедитесь, что сбой хранилища не прерывает опрос '
+            'остальных пользователей'
+        )
+        assert stores[0].failures == 5, (
+            'Убедитесь, что сбои хранилища не завершают работу воркера'
+        )
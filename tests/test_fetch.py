@@ -0,0 +1,100 @@
+from http import HTTPStatus
+
+import pytest
+import requests
+import utils
+
+import homework
+import metrics
+from scheduler import TenantState
+from tenants import Tenant
+
+
+@pytest.fixture
+def api(monkeypatch):
+    fake = utils.StubApi()
+    monkeypatch.setattr(requests, 'get', fake)
+    return fake
+
+
+def make_state():
+    return TenantState(Tenant('t1', 'token', 1), 100)
+
+
+def payload(current_date, status='approved'):
+    return {
+        'homeworks': [{'homework_name': 'hw', 'status': status}],
+        'current_date': current_date,
+    }
+
+
+class TestFetch:
+
+    def test_unchanged_body_advances_timestamp(self, api):
+        state = make_state()
+        api.responses = [
+            utils.StubResponse(payload(200), etag='"v1"'),
+            utils.StubResponse(payload(300)),
+        ]
+        assert homework.poll_tenant([], state)[0]
+        assert (state.current_timestamp, state.etag) == (200, '"v1"')
+        assert state.fingerprint is not None
+
+        unchanged = metrics.snapshot().get('poll.unchanged', 0)
+        success, changed = homework.poll_tenant([], state)
+        assert success and changed is None, (
+            'Убедитесь, что неизменившийся ответ не считается новым статусом'
+        )
+        assert len(api.requests) == 2 and state.current_timestamp == 300, (
+            'Убедитесь, что по совпавшему отпечатку сдвигается только '
+            'current_timestamp'
+        )
+        assert metrics.snapshot()['poll.unchanged'] == unchanged + 1
+
+    def test_unchanged_body_skips_json(self, api):
+        state = make_state()
+        api.responses = [utils.StubResponse(payload(200))]
+        homework.poll_tenant([], state)
+        response = utils.StubResponse(payload(300))
+        api.responses = [response]
+        assert homework.fetch_tenant(state) is None
+        assert response.decoded == 0, (
+            'Убедитесь, что ответ с совпавшим отпечатком не разбирается'
+        )
+
+    def test_not_modified_short_circuits(self, api):
+        state = make_state()
+        state.etag = '"v1"'
+        api.responses = [
+            utils.StubResponse(status_code=HTTPStatus.NOT_MODIFIED)
+        ]
+        unchanged = metrics.snapshot().get('poll.unchanged', 0)
+
+        assert homework.poll_tenant([], state) == (True, None), (
+            'Убедитесь, что ответ 304 считается успешным опросом'
+        )
+        headers, params = api.requests[0]
+        assert headers['If-None-Match'] == '"v1"', (
+            'Убедитесь, что сохранённый ETag отправляется в If-None-Match'
+        )
+        assert params == {'from_date': 100}
+        assert state.current_timestamp == 100
+        assert metrics.snapshot()['poll.unchanged'] == unchanged + 1
+
+    def test_fingerprint_stored_only_after_validation(self, api):
+        state = make_state()
+        invalid = {'homeworks': 'hw', 'current_date': 200}
+        api.responses = [
+            utils.StubResponse(invalid, etag='"bad"'),
+            utils.StubResponse(invalid, etag='"bad"'),
+        ]
+        assert not homework.poll_tenant([], state)[0]
+        assert state.fingerprint is None and state.etag is None, (
+            'Убедитесь, что отпечаток и ETag неверного ответа '
+            'не сохраняются'
+        )
+        assert not homework.poll_tenant([], state)[0], (
+            'Убедитесь, что повторный неверный ответ снова проверяется'
+        )
+        assert 'If-None-Match' not in api.requests[1][0]
+        assert state.current_timestamp == 100
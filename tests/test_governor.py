@@ -0,0 +1,190 @@
+import time
+from http import HTTPStatus
+
+import pytest
+import requests
+import utils
+
+import governor
+import health
+import homework
+import leases
+import metrics
+import planner
+import storage
+from scheduler import Scheduler
+from tenants import Tenant
+
+
+class RecordingWait:
+
+    def __init__(self):
+        self.delays = []
+
+    def __call__(self, timeout):
+        self.delays.append(timeout)
+        return True
+
+
+def tokens(api):
+    return [headers['Authorization'] for headers, _ in api.requests]
+
+
+class Worker:
+
+    def __init__(self, quota, tenants=3):
+        self.conn = storage.connect(':memory:')
+        self.keeper = leases.LeaseKeeper(
+            self.conn, 'a', homework.LEASE_PARTITIONS, homework.LEASE_TTL,
+            homework.LEASE_RENEW_TIME
+        )
+        self.scheduler = Scheduler(homework.RETRY_TIME)
+        for index in range(tenants):
+            self.scheduler.add(
+                Tenant(str(index), f'token-{index}', index), now=0
+            )
+        self.quota = quota
+        homework.renew_leases(self.keeper, self.scheduler, quota, force=True)
+        self.planner = planner.PollPlanner(
+            homework.RETRY_TIME, homework.MIN_RETRY_TIME,
+            homework.MAX_RETRY_TIME
+        )
+
+    def poll_due(self, now):
+        homework.poll_due(
+            [], self.conn, self.scheduler, self.planner, self.quota,
+            health.Health(lambda: 0, lambda: 0, 1, 1, 1, 1), self.keeper,
+            now
+        )
+
+    def due(self, tenant_id):
+        state = self.scheduler.states[tenant_id]
+        return next(
+            due for due, key, generation in self.scheduler.queue
+            if key == tenant_id and generation == state.generation
+        )
+
+
+class UnlimitedGovernor(governor.Governor):
+
+    def acquire(self, wait):
+        return True
+
+
+class TestGovernor:
+
+    def test_acquire_paces_requests(self):
+        quota = governor.Governor(2)
+        wait = RecordingWait()
+
+        assert quota.acquire(wait) and quota.acquire(wait), (
+            'Убедитесь, что запас токенов выдаётся без ожидания'
+        )
+        assert not quota.acquire(wait), (
+            'Убедитесь, что acquire возвращает False, если ждать не нужно'
+        )
+        assert wait.delays[0] == pytest.approx(0.5, abs=0.01), (
+            'Убедитесь, что следующий запрос ждёт 1/rate секунд'
+        )
+
+    def test_share_scales_rate(self):
+        quota = governor.Governor(10)
+        quota.set_share(0.5)
+        assert quota.rate == 5, (
+            'Убедитесь, что копия получает свою долю бюджета'
+        )
+        quota.set_share(0)
+        assert quota.rate == 1 / governor.WINDOW, (
+            'Убедитесь, что темп копии не падает до нуля'
+        )
+
+    def test_throttling_backs_off(self):
+        quota = governor.Governor(8)
+        quota.feedback(True)
+        assert quota.rate == 4 and quota.tokens <= 0, (
+            'Убедитесь, что на ответ 429 темп уменьшается вдвое'
+        )
+        quota.feedback(False)
+        assert 4 < quota.rate < 8, (
+            'Убедитесь, что темп восстанавливается после успешных запросов'
+        )
+        for _ in range(100):
+            quota.feedback(False)
+        assert quota.rate == 8, (
+            'Убедитесь, что темп не превышает бюджет'
+        )
+
+    def test_usage_is_computed_on_read(self):
+        quota = governor.Governor(1)
+        quota.acquire(RecordingWait())
+        assert metrics.snapshot()['governor.usage'] == pytest.approx(
+            1 / governor.WINDOW
+        )
+        quota.granted[0] -= governor.WINDOW
+        assert metrics.snapshot()['governor.usage'] == 0, (
+            'Убедитесь, что загрузка пересчитывается при чтении метрик'
+        )
+
+    def test_poll_due_prefers_reviewing_and_backs_off(self, monkeypatch):
+        api = utils.StubApi(
+            utils.StubResponse(status_code=HTTPStatus.TOO_MANY_REQUESTS)
+        )
+        monkeypatch.setattr(requests, 'get', api)
+        worker = Worker(governor.Governor(1_000_000))
+        worker.scheduler.states['2'].reviewing = True
+
+        worker.poll_due(homework.RETRY_TIME)
+        assert tokens(api)[0] == 'OAuth token-2', (
+            'Убедитесь, что работы на проверке опрашиваются первыми'
+        )
+        assert worker.quota.rate == 1_000_000 * governor.BACKOFF ** 3, (
+            'Убедитесь, что ответы 429 замедляют опрос'
+        )
+
+    def test_reviewing_tenant_due_mid_cycle_goes_first(self, monkeypatch):
+        api = utils.StubApi(
+            utils.StubResponse(status_code=HTTPStatus.NOT_MODIFIED)
+        )
+        monkeypatch.setattr(requests, 'get', api)
+        monkeypatch.setattr(homework, 'REGISTRY_CHECK_TIME', 0)
+        worker = Worker(governor.Governor(1_000_000), tenants=4)
+        now = homework.RETRY_TIME
+
+        worker.poll_due(now)
+        assert len(tokens(api)) == 1, (
+            'Убедитесь, что обход длится не дольше REGISTRY_CHECK_TIME'
+        )
+        assert worker.scheduler.backlog(now) == 3, (
+            'Убедитесь, что неопрошенные пользователи остаются в очереди'
+        )
+        waiting = next(
+            tenant_id for tenant_id in worker.scheduler.states
+            if f'OAuth token-{tenant_id}' != tokens(api)[0]
+        )
+        worker.scheduler.states[waiting].reviewing = True
+        worker.poll_due(now)
+        assert tokens(api)[1] == f'OAuth token-{waiting}', (
+            'Убедитесь, что работа, попавшая на проверку во время '
+            'долгого обхода, опрашивается следующей'
+        )
+
+    def test_dense_tenant_gets_no_more_than_fair_share(self, monkeypatch):
+        monkeypatch.setattr(requests, 'get', utils.StubApi(
+            utils.StubResponse(status_code=HTTPStatus.NOT_MODIFIED)
+        ))
+        worker = Worker(UnlimitedGovernor(1 / governor.WINDOW))
+        now = time.time()
+        for index in range(1000):
+            worker.planner.record('0', now - index)
+        assert worker.planner.next_interval('0', now) == (
+            homework.MIN_RETRY_TIME
+        ), 'Тест должен опираться на пользователя с частыми сменами'
+
+        worker.poll_due(now + homework.RETRY_TIME)
+        fair = worker.quota.fair_interval(3)
+        assert fair > homework.MIN_RETRY_TIME
+        for tenant_id in worker.scheduler.states:
+            assert worker.due(tenant_id) >= now + fair, (
+                'Убедитесь, что при нехватке бюджета никто не опрашивается '
+                'чаще равной доли'
+            )
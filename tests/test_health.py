@@ -0,0 +1,159 @@
+import json
+import urllib.error
+import urllib.request
+from http import HTTPStatus
+
+import pytest
+import utils
+
+import governor
+import health
+import homework
+import leases
+import storage
+from scheduler import Scheduler
+from tenants import Tenant
+
+MAX_AGE = 10
+
+
+class Queues:
+
+    def __init__(self):
+        self.backlog_time = 0
+        self.outbox = 0
+
+
+def make_health(queues):
+    return health.Health(
+        lambda: queues.backlog_time, lambda: queues.outbox,
+        MAX_AGE, MAX_AGE, 5, 5
+    )
+
+
+@pytest.fixture
+def server():
+    queues = Queues()
+    worker_health = make_health(queues)
+    server = health.serve(worker_health, 0)
+    yield worker_health, queues, server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def get(port, path):
+    try:
+        with urllib.request.urlopen(
+            f'http://127.0.0.1:{port}{path}', timeout=5
+        ) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as error:
+        return error.code, json.load(error)
+
+
+class TestHealth:
+
+    def test_fresh_worker_is_healthy(self):
+        healthy, report = make_health(Queues()).report()
+        assert healthy, 'Убедитесь, что только запущенный воркер здоров'
+        assert set(report) == {
+            'progress_age', 'poll_age', 'failing_for', 'backlog_time',
+            'outbox'
+        }
+
+    def test_stale_progress_is_unhealthy(self):
+        worker_health = make_health(Queues())
+        worker_health.last_progress -= MAX_AGE + 1
+        assert not worker_health.report()[0], (
+            'Убедитесь, что воркер без прогресса дольше порога нездоров'
+        )
+        worker_health.mark_cycle()
+        assert worker_health.report()[0]
+
+    def test_failing_polls_are_unhealthy(self):
+        worker_health = make_health(Queues())
+        worker_health.last_poll -= MAX_AGE + 1
+        worker_health.mark_attempt(False)
+        assert not worker_health.report()[0], (
+            'Убедитесь, что долгие неудачные опросы делают воркер нездоровым'
+        )
+        worker_health.mark_attempt(True)
+        assert worker_health.report()[0], (
+            'Убедитесь, что успешный опрос возвращает здоровье'
+        )
+
+    @pytest.mark.parametrize('queue', ['backlog_time', 'outbox'])
+    def test_long_queue_is_unhealthy(self, queue):
+        queues = Queues()
+        worker_health = make_health(queues)
+        setattr(queues, queue, 5)
+        assert worker_health.report()[0], (
+            'Убедитесь, что очередь на пороге допустима'
+        )
+        setattr(queues, queue, 6)
+        assert not worker_health.report()[0], (
+            f'Убедитесь, что длинная очередь {queue} делает воркер нездоровым'
+        )
+
+    def test_http_statuses(self, server):
+        worker_health, queues, port = server
+        status, body = get(port, '/health')
+        assert status == HTTPStatus.OK, (
+            'Убедитесь, что здоровый воркер отвечает 200'
+        )
+        assert body['backlog_time'] == 0
+        queues.backlog_time = 6
+        status, body = get(port, '/health')
+        assert status == HTTPStatus.SERVICE_UNAVAILABLE, (
+            'Убедитесь, что нездоровый воркер отвечает 503'
+        )
+        assert body['backlog_time'] == 6
+        assert get(port, '/metrics')[0] == HTTPStatus.OK
+        assert get(port, '/unknown')[0] == HTTPStatus.NOT_FOUND
+
+    def test_waiting_for_budget_marks_progress(self, monkeypatch):
+        shutdown = utils.StubShutdown()
+        monkeypatch.setattr(homework, 'SHUTDOWN', shutdown)
+        conn = storage.connect(':memory:')
+        keeper = leases.LeaseKeeper(conn, 'a', 8, 30, 5)
+        quota = governor.Governor(1 / governor.WINDOW)
+        quota.tokens = 0
+        worker_health = make_health(Queues())
+        worker_health.last_progress -= MAX_AGE + 1
+
+        wait = homework.budget_waiter(
+            keeper, Scheduler(homework.RETRY_TIME), quota, worker_health
+        )
+        assert not quota.acquire(wait)
+        assert worker_health.report()[0], (
+            'Убедитесь, что ожидание бюджета отмечает прогресс'
+        )
+        assert shutdown.timeouts[0] <= homework.REGISTRY_CHECK_TIME, (
+            'Убедитесь, что ожидание бюджета режется на короткие отрезки'
+        )
+        assert keeper.owned, (
+            'Убедитесь, что во время ожидания продлеваются аренды'
+        )
+
+    def test_paced_backlog_is_healthy(self):
+        conn = storage.connect(':memory:')
+        keeper = leases.LeaseKeeper(conn, 'a', 8, 30, 5)
+        scheduler = Scheduler(homework.RETRY_TIME)
+        tenants = 7000
+        for index in range(tenants):
+            scheduler.add(Tenant(str(index), 'token', index), now=0)
+        quota = governor.Governor(10)
+        keeper.refresh(force=True)
+        assert homework.backlog_time(scheduler, keeper, quota) == (
+            tenants / 10
+        ), 'Убедитесь, что очередь оценивается временем её разбора'
+        assert homework.backlog_time(
+            scheduler, keeper, quota
+        ) <= homework.HEALTH_MAX_BACKLOG_TIME, (
+            'Убедитесь, что очередь, сдерживаемая бюджетом, не делает '
+            'воркер нездоровым'
+        )
+        keeper.owned = set()
+        assert homework.backlog_time(scheduler, keeper, quota) == 0, (
+            'Убедитесь, что чужие пользователи не учитываются в очереди'
+        )
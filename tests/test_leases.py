@@ -0,0 +1,81 @@
+import leases
+import storage
+
+PARTITIONS = 8
+TTL = 10
+
+
+class TestLeases:
+
+    def test_claim_takes_all_free_partitions(self):
+        conn = storage.connect(':memory:')
+
+        owned = leases.claim(conn, 'a', PARTITIONS, TTL, now=0)
+        assert owned == set(range(PARTITIONS)), (
+            'Убедитесь, что единственная копия забирает все разделы'
+        )
+
+    def test_claim_rebalances_between_replicas(self):
+        conn = storage.connect(':memory:')
+        leases.claim(conn, 'a', PARTITIONS, TTL, now=0)
+
+        assert leases.claim(conn, 'b', PARTITIONS, TTL, now=1) == set(), (
+            'Убедитесь, что новая копия не забирает занятые разделы'
+        )
+        first = leases.claim(conn, 'a', PARTITIONS, TTL, now=2)
+        second = leases.claim(conn, 'b', PARTITIONS, TTL, now=3)
+        assert len(first) == len(second) == PARTITIONS // 2, (
+            'Убедитесь, что копии делят разделы поровну'
+        )
+        assert not first & second, (
+            'Убедитесь, что один раздел не принадлежит двум копиям'
+        )
+
+    def test_claim_takes_over_expired_partitions(self):
+        conn = storage.connect(':memory:')
+        leases.claim(conn, 'a', PARTITIONS, TTL, now=0)
+        leases.claim(conn, 'b', PARTITIONS, TTL, now=1)
+
+        owned = leases.claim(conn, 'b', PARTITIONS, TTL, now=TTL + 1)
+        assert owned == set(range(PARTITIONS)), (
+            'Убедитесь, что разделы умершей копии забираются '
+            'после истечения аренды'
+        )
+
+    def test_claim_keeps_unexpired_partitions(self):
+        conn = storage.connect(':memory:')
+        leases.claim(conn, 'a', PARTITIONS, TTL, now=0)
+
+        owned = leases.claim(conn, 'b', PARTITIONS, TTL, now=TTL - 1)
+        assert owned == set(), (
+            'Убедитесь, что неистёкшая аренда не уходит другой копии'
+        )
+
+    def test_release_frees_partitions_at_once(self):
+        conn = storage.connect(':memory:')
+        leases.claim(conn, 'a', PARTITIONS, TTL, now=0)
+        leases.claim(conn, 'b', PARTITIONS, TTL, now=1)
+
+        leases.release(conn, 'a')
+        owned = leases.claim(conn, 'b', PARTITIONS, TTL, now=2)
+        assert owned == set(range(PARTITIONS)), (
+            'Убедитесь, что отпущенные разделы сразу забирает другая копия'
+        )
+
+    def test_keeper_reports_acquired_partitions(self):
+        conn = storage.connect(':memory:')
+        keeper = leases.LeaseKeeper(conn, 'a', PARTITIONS, TTL, 5)
+
+        assert keeper.refresh() == set(range(PARTITIONS)), (
+            'Убедитесь, что первое продление возвращает новые разделы'
+        )
+        assert keeper.refresh() == set(), (
+            'Убедитесь, что аренды не продлеваются чаще renew_time'
+        )
+        assert keeper.refresh(force=True) == set(), (
+            'Убедитесь, что уже принадлежащие разделы не считаются новыми'
+        )
+        keeper.release()
+        assert keeper.share() == 0, (
+            'Убедитесь, что после release у копии нет разделов'
+        )
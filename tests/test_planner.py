@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+import planner
+
+BUDGET = 600
+WEEK_START = 1_699_833_600  # понедельник, 00:00 UTC
+
+
+def bursty_transitions(count, hours=(10, 14, 20), seed=0):
+    rng = random.Random(seed)
+    return sorted(
+        (
+            f't{index % 10}',
+            WEEK_START + rng.randrange(8) * 7 * 86400
+            + rng.randrange(5) * 86400 + rng.choice(hours) * 3600
+            + rng.random() * 3600,
+        )
+        for index in range(count)
+    )
+
+
+class TestPlanner:
+
+    def test_week_bin(self):
+        assert planner.week_bin(WEEK_START) == 0, (
+            'Убедитесь, что неделя начинается с понедельника'
+        )
+        assert planner.week_bin(WEEK_START + 86400 + 3 * 3600) == 27, (
+            'Проверьте номер часа недели'
+        )
+
+    def test_distribute_keeps_budget(self):
+        weights = [1] * planner.WEEK_BINS
+        weights[10] = 100
+        intervals = planner.distribute(weights, BUDGET, 1, 10 ** 6)
+        calls = sum(planner.HOUR / interval for interval in intervals)
+        assert calls == pytest.approx(planner.WEEK_BINS * 3600 / BUDGET), (
+            'Убедитесь, что число опросов в неделю равно бюджету'
+        )
+        assert intervals[10] < intervals[0], (
+            'Убедитесь, что в частые часы опросы идут чаще'
+        )
+
+    def test_distribute_respects_limits(self):
+        weights = [1] * planner.WEEK_BINS
+        weights[0] = 10 ** 6
+        intervals = planner.distribute(weights, BUDGET, 60, 3600)
+        assert min(intervals) >= 60 and max(intervals) <= 3600, (
+            'Убедитесь, что интервалы не выходят за пределы'
+        )
+
+    @pytest.mark.parametrize('hot', [1, 10, 100])
+    def test_distribute_keeps_budget_when_clamped(self, hot):
+        weights = [1] * planner.WEEK_BINS
+        for hour in range(hot):
+            weights[hour] = 10 ** 4
+        intervals = planner.distribute(weights, BUDGET, 60, 3600)
+        assert 60 in intervals or 3600 in intervals, (
+            'Тест должен упираться в границы интервала'
+        )
+        calls = sum(planner.HOUR / interval for interval in intervals)
+        assert calls == pytest.approx(planner.WEEK_BINS * 3600 / BUDGET), (
+            'Убедитесь, что бюджет сохраняется, когда интервалы '
+            'упираются в границы'
+        )
+        assert min(intervals) >= 60 and max(intervals) <= 3600
+
+    def test_tenant_plan_keeps_budget(self):
+        poll_planner = planner.PollPlanner(BUDGET, 60, 3600)
+        for index in range(500):
+            poll_planner.record('a', WEEK_START + 10 * 3600 + index)
+        for tenant_id in ('a', 'new'):
+            intervals = poll_planner.intervals(tenant_id)
+            calls = sum(planner.HOUR / interval for interval in intervals)
+            assert calls == pytest.approx(
+                planner.WEEK_BINS * 3600 / BUDGET
+            ), (
+                'Убедитесь, что план каждого пользователя тратит '
+                'весь бюджет'
+            )
+
+    def test_tenant_without_history_uses_global_plan(self):
+        poll_planner = planner.PollPlanner(BUDGET, 60, 3600)
+        for tenant_id, at in bursty_transitions(100):
+            poll_planner.record(tenant_id, at)
+        assert poll_planner.intervals('new') == poll_planner.distribute(
+            poll_planner.global_weights()
+        ), (
+            'Убедитесь, что пользователь без истории получает '
+            'глобальное расписание'
+        )
+
+    def test_evaluate_beats_constant_polling(self):
+        report = planner.evaluate(bursty_transitions(2000), BUDGET, 60, 3600)
+        constant_delay, constant_calls = report['constant']
+        delay, calls = report['predictive']
+        assert constant_delay == BUDGET / 2, (
+            'Убедитесь, что при постоянном опросе задержка равна '
+            'половине интервала'
+        )
+        assert calls == pytest.approx(constant_calls), (
+            'Убедитесь, что планы сравниваются при одинаковом бюджете'
+        )
+        assert delay < constant_delay, (
+            'Убедитесь, что предсказательный опрос сокращает задержку'
+        )
+        tenant_delay, tenant_calls = report['per_tenant']
+        assert tenant_calls == pytest.approx(constant_calls), (
+            'Убедитесь, что планы пользователей тратят тот же бюджет'
+        )
+        assert tenant_delay < constant_delay, (
+            'Убедитесь, что планы пользователей сокращают задержку'
+        )
@@ -0,0 +1,56 @@
+from scheduler import Scheduler
+from tenants import Tenant
+
+INTERVAL = 600
+
+
+def due_ids(scheduler, now):
+    return [state.tenant.id for state in scheduler.pop_due(now)]
+
+
+class TestScheduler:
+
+    def test_apply_adds_updates_and_cancels(self):
+        scheduler = Scheduler(INTERVAL)
+        first, second = Tenant('1', 'a', 1), Tenant('2', 'b', 2)
+        scheduler.apply(([first, second], [], []), now=0)
+        state = scheduler.states['1']
+        state.current_timestamp = 123
+
+        changed = Tenant('1', 'new', 1)
+        scheduler.apply(([], [second], [changed]), now=0)
+        assert scheduler.states['1'] is state, (
+            'Убедитесь, что изменение пользователя сохраняет его состояние'
+        )
+        assert state.tenant == changed and state.current_timestamp == 123, (
+            'Убедитесь, что изменение пользователя обновляет только его данные'
+        )
+        assert due_ids(scheduler, INTERVAL) == ['1'], (
+            'Убедитесь, что удалённый пользователь снят с опроса'
+        )
+
+    def test_readded_tenant_is_polled_once(self):
+        scheduler = Scheduler(INTERVAL)
+        tenant = Tenant('1', 'a', 1)
+        scheduler.add(tenant, now=0)
+        scheduler.cancel(tenant.id)
+        scheduler.add(tenant, now=0)
+
+        assert due_ids(scheduler, INTERVAL) == ['1'], (
+            'Убедитесь, что после удаления и повторного добавления '
+            'пользователь опрашивается один раз'
+        )
+
+    def test_pop_due_orders_by_priority(self):
+        scheduler = Scheduler(1)
+        for index in range(3):
+            scheduler.add(Tenant(str(index), 't', index), now=0)
+        scheduler.states['2'].reviewing = True
+
+        order = [
+            state.tenant.id
+            for state in scheduler.pop_due(0, lambda s: not s.reviewing)
+        ]
+        assert order[0] == '2', (
+            'Убедитесь, что пользователи с ключом приоритета идут первыми'
+        )
@@ -0,0 +1,127 @@
+import threading
+import time
+
+import metrics
+import sinks
+
+WAIT = 5
+
+
+class RecordingSink(sinks.Sink):
+
+    name = 'recording'
+
+    def __init__(self, timeout=1, delay=0, error=None):
+        super().__init__(timeout)
+        self.delay = delay
+        self.error = error
+        self.release = threading.Event()
+        self.release.set()
+        self.sent = []
+
+    def send(self, chat_id, message):
+        self.release.wait(WAIT)
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        self.sent.append((chat_id, message))
+
+
+class BrokenSink(RecordingSink):
+
+    name = 'broken'
+
+
+class Result:
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.calls = []
+
+    def __call__(self, delivered):
+        self.calls.append(delivered)
+        self.event.set()
+
+    def wait(self):
+        assert self.event.wait(WAIT), 'Доставка не завершилась'
+        return self.calls
+
+
+class TestSinks:
+
+    def test_deliver_does_not_wait_for_sinks(self):
+        sink = RecordingSink()
+        sink.release.clear()
+        result = Result()
+
+        start = time.monotonic()
+        sinks.deliver([sink], 1, 'text', result)
+        assert time.monotonic() - start < 0.5, (
+            'Убедитесь, что deliver не ждёт завершения доставки'
+        )
+        assert sinks.outbox_depth([sink]) == 1, (
+            'Убедитесь, что незавершённая доставка учитывается в очереди'
+        )
+        sink.release.set()
+        assert result.wait() == [True], (
+            'Убедитесь, что callback вызывается один раз после доставки'
+        )
+        assert sink.sent == [(1, 'text')]
+
+    def test_broken_sink_does_not_block_others(self):
+        slow = RecordingSink()
+        slow.release.clear()
+        broken = BrokenSink(error=RuntimeError('down'))
+        result = Result()
+        errors = metrics.snapshot().get('sink.broken.errors', 0)
+
+        sinks.deliver([broken, slow], 1, 'text', result)
+        assert not result.event.wait(0.2), (
+            'Убедитесь, что итог известен только после всех каналов'
+        )
+        assert metrics.snapshot()['sink.broken.errors'] == errors + 1, (
+            'Убедитесь, что ошибки канала учитываются в метриках'
+        )
+        slow.release.set()
+        assert result.wait() == [True], (
+            'Убедитесь, что сбой одного канала не мешает доставке в другие'
+        )
+
+    def test_failed_delivery_reports_false(self):
+        result = Result()
+        sinks.deliver([BrokenSink(error=RuntimeError('down'))], 1, 'text',
+                      result)
+        assert result.wait() == [False], (
+            'Убедитесь, что callback получает False, если никто не доставил'
+        )
+        result = Result()
+        sinks.deliver([], 1, 'text', result)
+        assert result.wait() == [False], (
+            'Убедитесь, что без каналов callback получает False'
+        )
+
+    def test_slow_delivery_counts_timeout(self):
+        sink = RecordingSink(timeout=0.01, delay=0.05)
+        result = Result()
+        before = metrics.snapshot()
+        timeouts = before.get('sink.recording.timeouts', 0)
+        count = before.get('sink.recording.latency.count', 0)
+
+        sinks.deliver([sink], 1, 'text', result)
+        result.wait()
+        after = metrics.snapshot()
+        assert after['sink.recording.timeouts'] == timeouts + 1, (
+            'Убедитесь, что доставка дольше таймаута учитывается в метриках'
+        )
+        assert after['sink.recording.latency.count'] == count + 1, (
+            'Убедитесь, что время доставки учитывается в метриках'
+        )
+        assert after['sink.recording.latency.max'] >= 0.05
+
+    def test_drain_waits_for_outbox(self):
+        sink = RecordingSink(delay=0.1)
+        sinks.deliver([sink], 1, 'text')
+        sinks.drain([sink], time.monotonic() + WAIT)
+        assert sink.sent == [(1, 'text')], (
+            'Убедитесь, что при остановке уведомления дожидаются доставки'
+        )
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+import tenants
+from tenants import Tenant
+
+
+def write_registry(path, items):
+    path.write_text(json.dumps(items))
+
+
+class TestTenants:
+
+    def test_diff(self):
+        old = {
+            '1': Tenant('1', 'a', 1),
+            '2': Tenant('2', 'b', 2),
+            '3': Tenant('3', 'c', 3),
+        }
+        new = {
+            '1': Tenant('1', 'a', 1),
+            '2': Tenant('2', 'b', 20),
+            '4': Tenant('4', 'd', 4),
+        }
+        added, removed, updated = tenants.diff(old, new)
+        assert added == [new['4']], 'Проверьте добавленных пользователей'
+        assert removed == [old['3']], 'Проверьте удалённых пользователей'
+        assert updated == [new['2']], 'Проверьте изменённых пользователей'
+
+    def test_watcher_returns_only_changes(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        write_registry(path, [{'id': 1, 'practicum_token': 'a', 'chat_id': 1}])
+        watcher = tenants.RegistryWatcher(str(path))
+
+        added, removed, updated = watcher.poll()
+        assert [tenant.id for tenant in added] == ['1'], (
+            'Убедитесь, что первый опрос реестра добавляет всех пользователей'
+        )
+        assert watcher.poll() is None, (
+            'Убедитесь, что неизменившийся файл не перечитывается'
+        )
+
+    @pytest.mark.parametrize('items', [
+        {'a': 1},
+        [1],
+        [{'id': 1}],
+    ])
+    def test_load_rejects_wrong_shape(self, tmp_path, items):
+        path = tmp_path / 'tenants.json'
+        write_registry(path, items)
+        with pytest.raises(ValueError):
+            tenants.load(str(path))
+
+    def test_bad_reload_keeps_worker_running(self, tmp_path):
+        import homework
+        from scheduler import Scheduler
+
+        path = tmp_path / 'tenants.json'
+        write_registry(path, {'a': 1})
+        scheduler = Scheduler(600)
+        homework.reload_registry(
+            tenants.RegistryWatcher(str(path)), scheduler, 0
+        )
+        assert scheduler.states == {}, (
+            'Убедитесь, что реестр неверной структуры не применяется '
+            'и не останавливает воркер'
+        )
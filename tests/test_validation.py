@@ -0,0 +1,77 @@
+import pytest
+
+import exceptions as ex
+import metrics
+from validation import Validator
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+RESPONSE_SCHEMA = (
+    ('homeworks', 'homeworks', list),
+    ('current_date', 'current_date', int),
+)
+HOMEWORK_SCHEMA = (
+    ('homework_name', 'name', str),
+    ('status', 'status', STATUSES),
+)
+
+
+def make_validator():
+    return Validator(RESPONSE_SCHEMA, 'homeworks', HOMEWORK_SCHEMA)
+
+
+class TestValidator:
+
+    def test_projects_records(self):
+        result = make_validator().validate({
+            'homeworks': [
+                {'homework_name': 'hw1', 'status': 'approved', 'id': 1},
+            ],
+            'current_date': 100,
+        })
+        assert result.current_date == 100, (
+            'Убедитесь, что валидатор возвращает current_date'
+        )
+        homework = result.homeworks[0]
+        assert (homework.name, homework.status) == ('hw1', 'approved'), (
+            'Убедитесь, что валидатор возвращает записи с полями схемы'
+        )
+
+    @pytest.mark.parametrize('response, reason', [
+        ([], 'type:response'),
+        ({'current_date': 1}, 'missing:homeworks'),
+        ({'homeworks': None, 'current_date': 1}, 'type:homeworks'),
+        ({'homeworks': [], 'current_date': '1'}, 'type:current_date'),
+    ])
+    def test_rejects_response(self, response, reason):
+        validator = make_validator()
+        with pytest.raises(ex.InvalidResponse):
+            validator.validate(response)
+        assert validator.rejections == {reason: 1}, (
+            f'Убедитесь, что отказ учитывается с причиной {reason}'
+        )
+        assert metrics.snapshot()[f'validation.rejected.{reason}'] >= 1, (
+            'Убедитесь, что отказы видны в метриках'
+        )
+
+    def test_skips_bad_items(self):
+        validator = make_validator()
+        result = validator.validate({
+            'homeworks': [
+                1,
+                {'status': 'approved'},
+                {'homework_name': 'hw', 'status': 'unknown'},
+                {'homework_name': 2, 'status': 'approved'},
+                {'homework_name': 'good', 'status': 'rejected'},
+            ],
+            'current_date': 5,
+        })
+        assert [homework.name for homework in result.homeworks] == ['good'], (
+            'Убедитесь, что неверные элементы пропускаются, '
+            'а верные остаются'
+        )
+        assert validator.rejections == {
+            'type:homework': 1,
+            'missing:homework_name': 1,
+            'value:status': 1,
+            'type:homework_name': 1,
+        }, 'Убедитесь, что каждый неверный элемент учитывается по причине'
@@ -1,3 +1,7 @@
+import json
+import os
+import threading
+from http import HTTPStatus
 from inspect import signature
 from types import ModuleType
 
@@ -37,3 +41,65 @@ def check_default_var_exists(scope: ModuleType, var_name: str) -> None:
         f'{var_name} должна быть переменной, а не функцией.'
     )
 
+
+class StubResponse:
+    """Ответ requests.get с заданным телом, статусом и ETag."""
+
+    def __init__(self, payload=None, status_code=HTTPStatus.OK, etag=None):
+        self.content = json.dumps(payload).encode()
+        self.status_code = status_code
+        self.headers = {'ETag': etag} if etag else {}
+        self.decoded = 0
+
+    def json(self):
+        self.decoded += 1
+        return json.loads(self.content)
+
+
+class StubApi:
+    """Подменяет requests.get: запоминает запросы и отдаёт ответы.
+
+    Ответы отдаются по очереди, последний повторяется.
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def __call__(self, url, headers=None, params=None, timeout=None):
+        self.requests.append((dict(headers), dict(params)))
+        if len(self.responses) > 1:
+            return self.responses.pop(0)
+        return self.responses[0]
+
+
+class StubBot:
+    """Бот Telegram, запоминающий отправленные сообщения."""
+
+    def __init__(self, *args, **kwargs):
+        self.messages = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.messages.append((chat_id, text))
+
+
+class StubShutdown(threading.Event):
+    """Подменяет homework.SHUTDOWN: любое ожидание завершается сразу.
+
+    Без signum wait только сообщает, что ждать больше не нужно, и само
+    событие не взводится, поэтому заглушку можно переиспользовать между
+    запусками main. С signum процессу посылается сигнал, и остановка
+    проходит через обработчик сигнала бота.
+    """
+
+    def __init__(self, signum=None):
+        super().__init__()
+        self.signum = signum
+        self.timeouts = []
+
+    def wait(self, timeout=None):
+        self.timeouts.append(timeout)
+        if self.signum is None:
+            return True
+        os.kill(os.getpid(), self.signum)
+        return super().wait(timeout)
@@ -0,0 +1,99 @@
+from collections import Counter, namedtuple
+
+import exceptions as ex
+import metrics
+
+
+def compile_projection(name, schema, reason, reject, many=False):
+    """Генерирует функцию проверки словаря по объявленной схеме.
+
+    Для каждого поля в функцию подставляется своя проверка: isinstance
+    для типа или поиск во frozenset для набора допустимых значений.
+    Результат — запись namedtuple с полями схемы. При many=True функция
+    принимает список словарей и проверяет их в одном цикле: неверный
+    элемент передаётся в reject и пропускается, а не прерывает проверку.
+    """
+    record = namedtuple(name, [field for _, field, _ in schema])
+    namespace = {
+        'record': record,
+        'new': tuple.__new__,
+        'reject': reject,
+    }
+
+    def fail(expression):
+        if many:
+            return [f'    reject({expression})', '    continue']
+        return [f'    reject({expression})']
+
+    body = ['if type(data) is not dict:']
+    body.extend(fail(repr(reason)))
+    body.append('try:')
+    body.extend(
+        f'    v{index} = data[{key!r}]'
+        for index, (key, _, _) in enumerate(schema)
+    )
+    body.append('except KeyError as error:')
+    body.extend(fail("f'missing:{error.args[0]}'"))
+    for index, (key, _, rule) in enumerate(schema):
+        if isinstance(rule, type):
+            namespace[f'rule{index}'] = rule
+            check = f'not isinstance(v{index}, rule{index})'
+            invalid = f'type:{key}'
+        else:
+            namespace[f'rule{index}'] = frozenset(rule)
+            check = f'v{index} not in rule{index}'
+            invalid = f'value:{key}'
+        body.append(f'if {check}:')
+        body.extend(fail(repr(invalid)))
+    values = ''.join(f'v{index}, ' for index in range(len(schema)))
+    if many:
+        lines = ['def project(items):', '    result = []',
+                 '    append = result.append', '    for data in items:']
+        lines.extend(f'        {line}' for line in body)
+        lines.append(f'        append(new(record, ({values})))')
+        lines.append('    return result')
+    else:
+        lines = ['def project(data):']
+        lines.extend(f'    {line}' for line in body)
+        lines.append(f'    return new(record, ({values}))')
+    exec('\n'.join(lines), namespace)
+    return namespace['project']
+
+
+class Validator:
+    """Проверяет ответ API и его элементы за один проход.
+
+    Схема объявляется как последовательность (ключ, поле записи,
+    правило), где правило — тип значения или набор допустимых значений.
+    Функции проверки генерируются один раз при создании валидатора.
+    Неверный ответ целиком отклоняется исключением, неверные элементы
+    пропускаются. Число отказов по каждой причине копится в rejections
+    и в метриках validation.rejected.<причина>.
+    """
+
+    def __init__(self, schema, items_key, item_schema):
+        self.rejections = Counter()
+        self.project = compile_projection(
+            'Response', schema, 'type:response', self.reject
+        )
+        self.project_items = compile_projection(
+            'Homework', item_schema, 'type:homework', self.count, many=True
+        )
+        self.items_index = [key for key, _, _ in schema].index(items_key)
+
+    def count(self, reason):
+        """Учитывает отказ."""
+        self.rejections[reason] += 1
+        metrics.increment(f'validation.rejected.{reason}')
+
+    def reject(self, reason):
+        """Учитывает отказ и выбрасывает исключение."""
+        self.count(reason)
+        raise ex.InvalidResponse(reason)
+
+    def validate(self, response):
+        """Возвращает типизированную запись ответа с его элементами."""
+        result = self.project(response)
+        index = self.items_index
+        items = self.project_items(result[index])
+        return result._replace(**{result._fields[index]: items})